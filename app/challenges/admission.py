@@ -0,0 +1,242 @@
+from __future__ import annotations
+import threading, time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# prioridade menor = atendida antes
+PRIORITIES = {"PROFESSOR": 0, "ALUNO": 1, "VISITANTE": 1}
+BULK_PRIORITY = 2
+
+
+class TokenBucket:
+    """Limite de taxa: `rate` fichas/s, acumulando no máximo `burst`."""
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.tokens = self.burst
+        self._last = time.monotonic()
+
+    def take(self, n: float = 1.0, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        if now > self._last:  # `now` pode ser anterior à criação do bucket (capturado antes)
+            self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+            self._last = now
+        if self.tokens >= n:
+            self.tokens -= n
+            return True
+        return False
+
+    def refund(self, n: float = 1.0) -> None:
+        """Devolve fichas de uma submissão recusada por outro limite."""
+        self.tokens = min(self.burst, self.tokens + n)
+
+    def full(self, now: float) -> bool:
+        """Cheio (ocioso): descartá-lo equivale a recriá-lo, que começa com `burst` fichas."""
+        return self.tokens + max(0.0, now - self._last) * self.rate >= self.burst
+
+
+@dataclass
+class Ack:
+    """Resposta imediata a uma submissão: QUEUED (aplicação adiada) ou REJECTED."""
+    status: str
+    ticket: Optional[int] = None
+    reason: Optional[str] = None
+    queue_depth: int = 0
+
+    @property
+    def accepted(self) -> bool:
+        return self.status == "QUEUED"
+
+
+class AdmissionController:
+    """Camada de admissão na frente da correção/premiação.
+
+    - fila limitada com uma deque por prioridade (PROFESSOR > ALUNO/VISITANTE > importação em lote)
+    - token bucket por usuário e global; excedeu, a submissão é recusada (load shedding)
+    - fila cheia: a entrada mais nova de prioridade inferior é descartada para abrir espaço,
+      ou a nova é recusada se não houver nenhuma
+    - `submit` só enfileira e devolve um Ack; `process` (ou a thread de `start`) aplica em ordem
+    """
+    def __init__(self, handler: Callable[[Dict[str, Any]], Dict[str, Any]], max_queue: int = 10000,
+                 global_rate: Optional[float] = None, global_burst: Optional[float] = None,
+                 user_rate: Optional[float] = None, user_burst: Optional[float] = None,
+                 priorities: Optional[Dict[str, int]] = None, keep_results: int = 10000,
+                 on_done: Optional[Callable[[int, Dict[str, Any]], None]] = None):
+        self.handler = handler
+        self.on_done = on_done  # chamado (sob o lock) com (ticket, resultado) de cada entrada concluída
+        self.max_queue = max_queue
+        self.priorities = dict(PRIORITIES if priorities is None else priorities)
+        self._levels = max(list(self.priorities.values()) + [BULK_PRIORITY]) + 1
+        self._queues: List[Deque[Tuple[int, float, Dict[str, Any]]]] = [deque() for _ in range(self._levels)]
+        self._global = TokenBucket(global_rate, global_burst) if global_rate else None
+        self._user_rate, self._user_burst = user_rate, user_burst
+        self._user_buckets: Dict[str, TokenBucket] = {}
+        self._prune_at = 1024  # limpa os buckets ociosos quando o dict passa disso (custo amortizado O(1))
+        self._results: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._keep_results = keep_results
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._ticket = 0
+        self._depth = 0
+        self.admitted = 0
+        self.processed = 0
+        self.max_depth = 0
+        self.shed: Dict[str, int] = {}
+        self._wait_total = 0.0
+        self.max_wait = 0.0
+
+    # ---------------- Admissão ----------------
+    def priority(self, role: Optional[str], bulk: bool = False) -> int:
+        return BULK_PRIORITY if bulk else self.priorities.get(role or "", 1)
+
+    def _shed(self, reason: str) -> Ack:
+        self.shed[reason] = self.shed.get(reason, 0) + 1
+        return Ack("REJECTED", reason=reason, queue_depth=self._depth)
+
+    def submit(self, username: str, role: Optional[str], payload: Dict[str, Any], bulk: bool = False) -> Ack:
+        prio = self.priority(role, bulk)
+        with self._cond:
+            now = time.monotonic()
+            bucket = None
+            if self._user_rate:
+                bucket = self._user_buckets.get(username)
+                if bucket is None:
+                    if len(self._user_buckets) >= self._prune_at:
+                        self._prune_buckets(now)
+                    bucket = self._user_buckets[username] = TokenBucket(self._user_rate, self._user_burst)
+                if not bucket.take(now=now):
+                    return self._shed("user_rate")
+            # recusa por outro limite devolve as fichas já gastas (não pune o usuário duas vezes)
+            if self._global is not None and not self._global.take(now=now):
+                if bucket is not None:
+                    bucket.refund()
+                return self._shed("global_rate")
+            if self._depth >= self.max_queue and not self._evict_below(prio):
+                if bucket is not None:
+                    bucket.refund()
+                if self._global is not None:
+                    self._global.refund()
+                return self._shed("queue_full")
+            self._ticket += 1
+            self._queues[prio].append((self._ticket, now, payload))
+            self._depth += 1
+            self.admitted += 1
+            self.max_depth = max(self.max_depth, self._depth)
+            self._cond.notify()
+            return Ack("QUEUED", self._ticket, queue_depth=self._depth)
+
+    def _prune_buckets(self, now: float) -> None:
+        self._user_buckets = {u: b for u, b in self._user_buckets.items() if not b.full(now)}
+        self._prune_at = max(1024, 2 * len(self._user_buckets))
+
+    def _evict_below(self, prio: int) -> bool:
+        """Descarta a entrada mais nova da menor prioridade abaixo de `prio`; False se não houver."""
+        for level in range(self._levels - 1, prio, -1):
+            if self._queues[level]:
+                ticket, _, _ = self._queues[level].pop()
+                self._depth -= 1
+                self.shed["evicted"] = self.shed.get("evicted", 0) + 1
+                self._store(ticket, {"error": "descartada por sobrecarga"})
+                return True
+        return False
+
+    # ---------------- Aplicação ----------------
+    def _next(self) -> Optional[Tuple[int, float, Dict[str, Any]]]:
+        for q in self._queues:
+            if q:
+                self._depth -= 1
+                return q.popleft()
+        return None
+
+    def _store(self, ticket: int, result: Dict[str, Any]) -> None:
+        self._results[ticket] = result
+        if self.on_done is not None:
+            self.on_done(ticket, result)
+        if len(self._results) > self._keep_results:
+            self._results.popitem(last=False)
+
+    def _run_one(self, item: Tuple[int, float, Dict[str, Any]]) -> None:
+        ticket, queued_at, payload = item
+        wait = time.monotonic() - queued_at
+        try:
+            result = self.handler(payload)
+        except Exception as e:  # uma submissão inválida não derruba a fila
+            result = {"error": str(e)}
+        with self._cond:
+            self._store(ticket, result)
+            self.processed += 1
+            self._wait_total += wait
+            self.max_wait = max(self.max_wait, wait)
+            self._cond.notify_all()
+
+    def process(self, max_items: Optional[int] = None) -> int:
+        """Aplica até `max_items` submissões da fila na thread atual (ex.: `after()` da GUI)."""
+        n = 0
+        while max_items is None or n < max_items:
+            with self._cond:
+                item = self._next()
+            if item is None:
+                break
+            self._run_one(item)
+            n += 1
+        return n
+
+    def result(self, ticket: int) -> Optional[Dict[str, Any]]:
+        """Resultado de um ticket já aplicado (None enquanto estiver na fila)."""
+        with self._cond:
+            return self._results.get(ticket)
+
+    # ---------------- Thread de aplicação ----------------
+    def start(self) -> "AdmissionController":
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._loop, name="admission", daemon=True)
+            self._thread.start()
+        return self
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._depth and not self._stopping:
+                    self._cond.wait()
+                if not self._depth and self._stopping:
+                    return
+                item = self._next()
+            self._run_one(item)
+
+    def stop(self, drain: bool = True) -> None:
+        """Encerra a thread; com `drain`, aplica antes o que restou na fila."""
+        with self._cond:
+            if not drain:
+                for q in self._queues:
+                    self.shed["dropped"] = self.shed.get("dropped", 0) + len(q)
+                    q.clear()
+                self._depth = 0
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "AdmissionController":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ---------------- Métricas ----------------
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "queue_depth": self._depth,
+                "depth_by_priority": [len(q) for q in self._queues],
+                "max_depth": self.max_depth,
+                "admitted": self.admitted,
+                "processed": self.processed,
+                "shed": dict(self.shed),
+                "shed_total": sum(self.shed.values()),
+                "avg_wait_ms": round(1000 * self._wait_total / self.processed, 3) if self.processed else 0.0,
+                "max_wait_ms": round(1000 * self.max_wait, 3),
+            }
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import List, Protocol, Dict, Any
+from typing import List, Mapping, Protocol, Dict, Any, Sequence
 
 class Challenge(Protocol):
     id: str
@@ -8,12 +8,30 @@ class Challenge(Protocol):
     difficulty: int
     def evaluate(self, answer: Any) -> Dict[str, Any]: ...
 
+class FrozenQuestion(dict):
+    """Questão somente leitura (continua um dict: picklável, copiável e serializável em JSON)."""
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("questões são imutáveis; reatribua QuizChallenge.questions")
+
+    __setitem__ = __delitem__ = __ior__ = update = setdefault = pop = popitem = clear = _readonly
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+
+def quiz_fingerprint(difficulty: int, questions: Sequence[Mapping[str, Any]]) -> bytes:
+    """Digest do que afeta a correção (dificuldade, gabarito e pesos): igual conteúdo => igual digest."""
+    from hashlib import blake2b
+    content = (difficulty, tuple((q.get("correct_index"), "weight" in q, q.get("weight")) for q in questions))
+    return blake2b(repr(content).encode(), digest_size=16).digest()
+
+
 @dataclass
 class QuizChallenge:
     id: str
     title: str
     difficulty: int
-    questions: List[Dict[str, Any]]  # each: {q, options, correct_index, weight?}
+    questions: Sequence[Mapping[str, Any]]  # each: {q, options, correct_index, weight?}
 
     def __init__(self, id: str, title: str, difficulty: int, questions: List[Dict[str, Any]]):
         self.id = id
@@ -21,6 +39,15 @@ class QuizChallenge:
         self.difficulty = difficulty
         self.questions = questions
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        # questões ficam imutáveis e só mudam por reatribuição, que recalcula o `fingerprint`
+        # (chave do GradingCache: outra instância com o mesmo id e outro gabarito não reaproveita entradas)
+        if name == "questions":
+            value = tuple(FrozenQuestion(q) for q in value)
+        object.__setattr__(self, name, value)
+        if name in ("questions", "difficulty") and hasattr(self, "questions") and hasattr(self, "difficulty"):
+            object.__setattr__(self, "fingerprint", quiz_fingerprint(self.difficulty, self.questions))
+
     def evaluate(self, answers: List[int]) -> Dict[str, Any]:
         correct = 0
         total = len(self.questions) if self.questions else 0
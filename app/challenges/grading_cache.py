@@ -0,0 +1,79 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from app.challenges.challenge import QuizChallenge
+from app.challenges.scoring import AccuracyStrategy, CompositeStrategy, DifficultyStrategy, TimeStrategy
+
+
+class GradingCache:
+    """Cache LRU de correções: (desafio, fingerprint, respostas) -> evaluate + pontuação base.
+
+    Só a parte independente do tempo é guardada (ex.: dificuldade + acerto); as
+    estratégias marcadas com `time_dependent` (TimeStrategy) são somadas a cada
+    tentativa. As questões do QuizChallenge são imutáveis; reatribuir `questions`/`difficulty`
+    muda seu `fingerprint` (digest do conteúdo), e as entradas anteriores são descartadas na próxima consulta.
+    """
+    def __init__(self, maxsize: int = 4096, strategy: Optional[CompositeStrategy] = None):
+        self.maxsize = maxsize
+        strategy = strategy or CompositeStrategy(DifficultyStrategy(), AccuracyStrategy(), TimeStrategy())
+        self._static, self._dynamic = strategy.split()
+        self._entries: "OrderedDict[Tuple[str, bytes, bytes], Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._fingerprints: Dict[str, bytes] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def answers_key(answers: Sequence[int]) -> bytes:
+        # chave exata para qualquer int (respostas fora de 32 bits não derrubam a correção)
+        return repr(tuple(answers)).encode()
+
+    def grade(self, challenge: QuizChallenge, answers: Sequence[int], time_sec: float) -> Dict[str, Any]:
+        """Resultado no mesmo formato do GradingPool: correct, total, accuracy, raw_points."""
+        fp = challenge.fingerprint
+        if self._fingerprints.get(challenge.id, fp) != fp:
+            self.invalidate(challenge.id)
+        self._fingerprints[challenge.id] = fp
+        key = (challenge.id, fp, self.answers_key(answers))
+        cached = self._entries.get(key)
+        if cached is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            result, base = cached
+        else:
+            self.misses += 1
+            result = challenge.evaluate(list(answers))
+            base = self._static.score({"difficulty": challenge.difficulty, "accuracy": result["accuracy"]})
+            self._entries[key] = (result, base)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        raw = base + self._dynamic.score({"difficulty": challenge.difficulty, "accuracy": result["accuracy"],
+                                          "time_sec": time_sec})
+        return dict(result, raw_points=raw)
+
+    def invalidate(self, challenge_id: Optional[str] = None) -> int:
+        """Remove as entradas de um desafio (ou todas); retorna quantas saíram."""
+        if challenge_id is None:
+            n = len(self._entries)
+            self._entries.clear()
+            self._fingerprints.clear()
+            return n
+        stale = [k for k in self._entries if k[0] == challenge_id]
+        for k in stale:
+            del self._entries[k]
+        self._fingerprints.pop(challenge_id, None)
+        return len(stale)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_ratio": round(self.hit_ratio, 4)}
@@ -0,0 +1,130 @@
+from __future__ import annotations
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.challenges.challenge import QuizChallenge
+
+# respostas vão para memória compartilhada como int32; o menor int32 fica reservado para
+# "sem resposta" (linha curta ou resposta fora de 32 bits) e nunca é um gabarito válido
+_I32_MIN, _I32_MAX = -(2 ** 31), 2 ** 31 - 1
+_NO_ANSWER = _I32_MIN
+_NO_KEY = float("nan")  # questão sem correct_index (ou fora de 32 bits): nunca coincide com uma resposta
+_OUT_COLS = 4         # correct, total, accuracy, raw_points
+
+
+def _grade_range(spec: tuple) -> None:
+    """Corrige as linhas [start, end) lendo e escrevendo apenas em memória compartilhada."""
+    from app.challenges.scoring import CompositeStrategy, DifficultyStrategy, AccuracyStrategy, TimeStrategy
+    key_name, subs_name, times_name, out_name, q, start, end, difficulty, weighted = spec
+    blocks = [SharedMemory(name=n) for n in (key_name, subs_name, times_name, out_name)]
+    views = [blocks[0].buf.cast("d"), blocks[1].buf.cast("i"), blocks[2].buf.cast("d"), blocks[3].buf.cast("d")]
+    key, subs, times, out = views
+    try:
+        correct_idx = key[:q].tolist()
+        weights = key[q:2 * q].tolist()
+        sum_w = sum(weights)
+        strat = CompositeStrategy(DifficultyStrategy(), AccuracyStrategy(), TimeStrategy())
+        for r in range(start, end):
+            row = subs[r * q:(r + 1) * q].tolist()
+            if weighted:
+                hit = sum(w for a, c, w in zip(row, correct_idx, weights) if a == c)
+                accuracy = (hit / sum_w) if sum_w > 0 else 0.0
+                correct, total = int(hit), int(sum_w)
+            else:
+                correct = sum(1 for a, c in zip(row, correct_idx) if a == c)
+                total = q
+                accuracy = (correct / total) if total else 0.0
+            raw = strat.score({"difficulty": difficulty, "accuracy": accuracy, "time_sec": times[r]})
+            o = r * _OUT_COLS
+            out[o], out[o + 1], out[o + 2], out[o + 3] = correct, total, accuracy, raw
+    finally:
+        for v in views:
+            v.release()
+        for b in blocks:
+            b.close()
+
+
+class GradingPool:
+    """Pool de processos para correção em lote (evaluate + CompositeStrategy).
+
+    Gabarito, matriz de respostas, tempos e resultados ficam em blocos de
+    `multiprocessing.shared_memory`; os workers recebem apenas nomes e índices.
+    Os resultados voltam na ordem de entrada, prontos para uma fase única e
+    sequencial de `PointsEngine.award`.
+    """
+    def __init__(self, workers: Optional[int] = None, chunks_per_worker: int = 4):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunks_per_worker = chunks_per_worker
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "GradingPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def grade(self, challenge: QuizChallenge, answers: Sequence[Sequence[int]],
+              times: Sequence[float]) -> List[Dict[str, Any]]:
+        """Corrige `answers[i]` (com tempo `times[i]`) e retorna os resultados na mesma ordem."""
+        n, q = len(answers), len(challenge.questions)
+        if n == 0:
+            return []
+        if q == 0:
+            return [{"correct": 0, "total": 0, "accuracy": 0.0,
+                     "raw_points": self._score_empty(challenge, t)} for t in times]
+        weighted = any("weight" in qq for qq in challenge.questions)
+        key = array("d", [float(c) if isinstance(c, (int, float)) and _I32_MIN < c <= _I32_MAX else _NO_KEY
+                          for c in (qq.get("correct_index") for qq in challenge.questions)])
+        key.extend(float(qq.get("weight", 1.0)) for qq in challenge.questions)
+
+        blocks = [
+            SharedMemory(create=True, size=key.itemsize * len(key)),
+            SharedMemory(create=True, size=4 * n * q),
+            SharedMemory(create=True, size=8 * n),
+            SharedMemory(create=True, size=8 * n * _OUT_COLS),
+        ]
+        views = [blocks[0].buf.cast("d"), blocks[1].buf.cast("i"), blocks[2].buf.cast("d"), blocks[3].buf.cast("d")]
+        try:
+            key_v, subs_v, times_v, out_v = views
+            key_v[:] = key
+            pad = [_NO_ANSWER] * q
+            for r, row in enumerate(answers):
+                row = [a if _I32_MIN < a <= _I32_MAX else _NO_ANSWER for a in row[:q]]
+                row += pad[len(row):]
+                subs_v[r * q:(r + 1) * q] = array("i", row)
+            times_v[:] = array("d", (float(t) for t in times))
+
+            step = max(1, -(-n // (self.workers * self.chunks_per_worker)))
+            specs = [(blocks[0].name, blocks[1].name, blocks[2].name, blocks[3].name, q,
+                      s, min(n, s + step), challenge.difficulty, weighted) for s in range(0, n, step)]
+            for _ in self._pool().map(_grade_range, specs):
+                pass
+
+            flat = out_v.tolist()
+        finally:
+            for v in views:
+                v.release()
+            for b in blocks:
+                b.close()
+                b.unlink()
+        return [{"correct": int(flat[o]), "total": int(flat[o + 1]), "accuracy": flat[o + 2],
+                 "raw_points": int(flat[o + 3])} for o in range(0, n * _OUT_COLS, _OUT_COLS)]
+
+    @staticmethod
+    def _score_empty(challenge: QuizChallenge, time_sec: float) -> int:
+        from app.challenges.scoring import CompositeStrategy, DifficultyStrategy, AccuracyStrategy, TimeStrategy
+        strat = CompositeStrategy(DifficultyStrategy(), AccuracyStrategy(), TimeStrategy())
+        return strat.score({"difficulty": challenge.difficulty, "accuracy": 0.0, "time_sec": time_sec})
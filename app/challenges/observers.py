@@ -1,36 +1,70 @@
 from __future__ import annotations
-from typing import Protocol, List, Dict, Any
+from typing import Protocol, List, Dict, Any, Iterable, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:  # evita importar json/AuditLog só para anotação
+    from app.utils.audit import AuditLog
 
 class Observer(Protocol):
+    # Opcional: atributo `events` (tupla de eventos de interesse); sem ele, recebe todos ("*").
     def update(self, event: str, payload: Dict[str, Any]) -> None: ...
 
+WILDCARD = "*"
+
 class Subject:
+    """Subject com assinaturas por tópico.
+
+    A tabela evento -> observers é montada no attach/detach; `notify` só chama
+    quem assinou aquele evento (ou o curinga "*"), e `wants` permite ao emissor
+    nem montar o payload quando ninguém está interessado.
+    """
     def __init__(self):
         self._observers: List[Observer] = []
+        self._topics: List[Tuple[str, ...]] = []
+        self._dispatch: Dict[str, Tuple[Observer, ...]] = {}
+        self._wildcard: Tuple[Observer, ...] = ()
 
-    def attach(self, obs: Observer) -> None:
-        if obs not in self._observers:
-            self._observers.append(obs)
+    def attach(self, obs: Observer, events: Optional[Iterable[str]] = None) -> None:
+        if obs in self._observers:
+            return
+        topics = tuple(events) if events is not None else tuple(getattr(obs, "events", (WILDCARD,)))
+        self._observers.append(obs)
+        self._topics.append(topics)
+        self._rebuild()
 
     def detach(self, obs: Observer) -> None:
         if obs in self._observers:
-            self._observers.remove(obs)
+            i = self._observers.index(obs)
+            del self._observers[i]
+            del self._topics[i]
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        # mantém a ordem de attach entre observers específicos e curingas
+        pairs = list(zip(self._observers, self._topics))
+        self._wildcard = tuple(o for o, t in pairs if WILDCARD in t)
+        events = {ev for _, t in pairs for ev in t if ev != WILDCARD}
+        self._dispatch = {ev: tuple(o for o, t in pairs if WILDCARD in t or ev in t) for ev in events}
+
+    def wants(self, event: str) -> bool:
+        return bool(self._dispatch.get(event, self._wildcard))
 
     def notify(self, event: str, payload: Dict[str, Any]) -> None:
-        for obs in list(self._observers):
+        for obs in self._dispatch.get(event, self._wildcard):
             obs.update(event, payload)
 
 class ConsoleNotifier:
+    events = ("POINTS_GAINED", "MEDAL_UNLOCKED")
+
     def update(self, event: str, payload: Dict[str, Any]) -> None:
         if event == "POINTS_GAINED":
             print(f"[NOTIF] {payload['username']} ganhou {payload['points']} pontos (total={payload['total']}).")
         elif event == "MEDAL_UNLOCKED":
             print(f"[NOTIF] {payload['username']} desbloqueou a medalha: {payload['medal']}.")
 
-from app.utils.audit import AuditLog
-
 class AuditObserver:
     """Observer que grava eventos no AuditLog."""
+    events = ("POINTS_GAINED", "MEDAL_UNLOCKED", "POINTS_REVERTED", "MEDAL_REVOKED")
+
     def __init__(self, audit: AuditLog):
         self.audit = audit
 
@@ -40,3 +74,7 @@ class AuditObserver:
             self.audit.add("POINTS_GAINED", username, {"points": payload.get("points"), "total": payload.get("total")})
         elif event == "MEDAL_UNLOCKED":
             self.audit.add("MEDAL_UNLOCKED", username, {"medal": payload.get("medal")})
+        elif event == "POINTS_REVERTED":
+            self.audit.add("POINTS_REVERTED", username, {"points": payload.get("points"), "total": payload.get("total")})
+        elif event == "MEDAL_REVOKED":
+            self.audit.add("MEDAL_REVOKED", username, {"medal": payload.get("medal")})
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Protocol, Dict, Any
+from typing import Protocol, Dict, Any, Tuple
 
 class ScoringStrategy(Protocol):
     def score(self, context: Dict[str, Any]) -> int: ...
@@ -16,6 +16,8 @@ class AccuracyStrategy:
         return int(200 * acc)
 
 class TimeStrategy:
+    time_dependent = True  # depende do tempo de cada tentativa: não entra no cache de correção
+
     def score(self, context: Dict[str, Any]) -> int:
         # Faster is better: time in seconds
         t = float(context.get("time_sec", 9999))
@@ -31,3 +33,9 @@ class CompositeStrategy:
 
     def score(self, context: Dict[str, Any]) -> int:
         return sum(s.score(context) for s in self.strategies)
+
+    def split(self) -> Tuple["CompositeStrategy", "CompositeStrategy"]:
+        """Separa (independentes do tempo, dependentes do tempo) pelo atributo `time_dependent`."""
+        static = [s for s in self.strategies if not getattr(s, "time_dependent", False)]
+        dynamic = [s for s in self.strategies if getattr(s, "time_dependent", False)]
+        return CompositeStrategy(*static), CompositeStrategy(*dynamic)
@@ -0,0 +1,580 @@
+"""CLI não interativa (python -m app) para tarefas em lote.
+
+Subcomandos:
+    grade    corrige um arquivo de submissões (JSON Lines ou CSV) e aplica os pontos
+    award    concede pontos em lote
+    export   exporta relatórios de desempenho (CSV/JSON/PDF)
+    compact  regrava data.json em formato compacto
+    analytics  agrega o audit log (pontos por usuário/dia, taxa de medalhas, eventos)
+    convert  converte entre data.json e o snapshot binário (.snap)
+    stats    resumo estatístico por papel (médias, quantis, níveis, medalhas)
+    generate gera carga sintética (usuários, desafios e trace de tentativas)
+    replay   reproduz um trace de tentativas em ritmo controlado
+"""
+from __future__ import annotations
+import argparse, json, os, sys, time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from app.challenges.challenge import QuizChallenge
+from app.utils.errors import DomainError
+
+BATCH_SIZE = 1000
+PARALLEL_BATCH_SIZE = 20000  # lotes maiores amortizam a criação dos blocos compartilhados
+
+
+# ---------------- Entrada ----------------
+def _parse_bool(value: Any, default: bool = False) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "s", "sim", "y", "yes")
+
+
+def _parse_streak(value: Any) -> int:
+    if value is None or value == "":
+        return 0
+    days = int(value)
+    if days < 0:
+        raise ValueError(f"streak_days negativo: {days}")
+    return days
+
+
+def _parse_time(value: Any) -> float:
+    if value is None or value == "":
+        return 9999.0  # sem tempo informado: sem bônus de rapidez
+    t = float(value)
+    if not t >= 0:  # negativo ou NaN
+        raise ValueError(f"time_sec inválido: {value}")
+    return t
+
+
+def _parse_answers(value: Any) -> List[int]:
+    if isinstance(value, list):
+        return [int(a) for a in value]
+    text = str(value or "").strip()
+    if not text:
+        return []
+    return [int(a) for a in text.replace(",", ";").split(";")]
+
+
+def read_records(path: str, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Lê registros um a um (streaming) de JSON Lines ou CSV; '-' lê da entrada padrão."""
+    if fmt is None:
+        fmt = "csv" if path.lower().endswith(".csv") else "jsonl"
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8", newline="")
+    try:
+        if fmt == "csv":
+            import csv
+            yield from csv.DictReader(f)
+        else:
+            for n, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise DomainError(f"{path}:{n}: JSON inválido ({e})")
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def count_lines(path: str) -> Optional[int]:
+    if path == "-":
+        return None
+    with open(path, "rb") as f:
+        n = sum(1 for line in f if line.strip())
+    return n - 1 if path.lower().endswith(".csv") else n
+
+
+def load_challenges(path: str) -> Dict[str, QuizChallenge]:
+    """Carrega desafios de um JSON: lista ou {id: {...}} com title, difficulty e questions."""
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    items = [dict(v, id=v.get("id", k)) for k, v in raw.items()] if isinstance(raw, dict) else raw
+    return {c["id"]: QuizChallenge(id=c["id"], title=c.get("title", c["id"]),
+                                   difficulty=int(c.get("difficulty", 1)), questions=c["questions"])
+            for c in items}
+
+
+def chunked(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for rec in records:
+        batch.append(rec)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Progress:
+    """Progresso simples em stderr (no máximo ~4 atualizações por segundo)."""
+    def __init__(self, label: str, total: Optional[int], enabled: bool = True):
+        self.label = label
+        self.total = total
+        self.enabled = enabled
+        self.done = 0
+        self._start = self._last = time.perf_counter()
+
+    def advance(self, n: int = 1) -> None:
+        self.done += n
+        now = time.perf_counter()
+        if self.enabled and now - self._last >= 0.25:
+            self._last = now
+            self._print(now)
+
+    def finish(self) -> None:
+        if self.enabled:
+            self._print(time.perf_counter())
+            sys.stderr.write("\n")
+
+    def _print(self, now: float) -> None:
+        rate = self.done / max(now - self._start, 1e-9)
+        pct = f" {100 * self.done / self.total:5.1f}%" if self.total else ""
+        sys.stderr.write(f"\r{self.label}: {self.done}{'/' + str(self.total) if self.total else ''}{pct} ({rate:.0f}/s)")
+        sys.stderr.flush()
+
+
+# ---------------- Correção ----------------
+def prepare_submission(sub: Dict[str, Any], challenges: Dict[str, QuizChallenge]):
+    """Valida uma submissão; retorna (resultado parcial, desafio, respostas, tempo)."""
+    ch_id = sub.get("challenge_id") or "quiz1"
+    out: Dict[str, Any] = {"username": sub.get("username"), "challenge_id": ch_id}
+    ch = challenges.get(ch_id)
+    if ch is None:
+        out["error"] = "desafio não encontrado"
+        return out, None, [], 0.0
+    try:
+        answers = _parse_answers(sub.get("answers"))
+        time_sec = _parse_time(sub.get("time_sec"))
+    except (TypeError, ValueError) as e:
+        out["error"] = f"submissão inválida: {e}"
+        return out, None, [], 0.0
+    out["time_sec"] = time_sec
+    return out, ch, answers, time_sec
+
+
+def grade_submission(sub: Dict[str, Any], challenges: Dict[str, QuizChallenge], cache=None) -> Dict[str, Any]:
+    """evaluate + CompositeStrategy para uma submissão (via GradingCache, se informado); não altera usuários."""
+    from app.challenges.scoring import CompositeStrategy, DifficultyStrategy, AccuracyStrategy, TimeStrategy
+    out, ch, answers, time_sec = prepare_submission(sub, challenges)
+    if ch is None:
+        return out
+    if cache is not None:
+        out.update(cache.grade(ch, answers, time_sec))
+        return out
+    result = ch.evaluate(answers)
+    strat = CompositeStrategy(DifficultyStrategy(), AccuracyStrategy(), TimeStrategy())
+    out.update(result)
+    out["raw_points"] = strat.score({"difficulty": ch.difficulty, "accuracy": result["accuracy"], "time_sec": time_sec})
+    return out
+
+
+def grade_batch_parallel(pool, batch: List[Dict[str, Any]], challenges: Dict[str, QuizChallenge]) -> List[Dict[str, Any]]:
+    """Corrige um lote no GradingPool, agrupando por desafio; mantém a ordem do lote."""
+    graded: List[Dict[str, Any]] = []
+    groups: Dict[str, List[int]] = {}
+    prepared = []
+    for i, sub in enumerate(batch):
+        out, ch, answers, time_sec = prepare_submission(sub, challenges)
+        graded.append(out)
+        prepared.append((answers, time_sec))
+        if ch is not None:
+            groups.setdefault(ch.id, []).append(i)
+    for ch_id, idx in groups.items():
+        results = pool.grade(challenges[ch_id], [prepared[i][0] for i in idx], [prepared[i][1] for i in idx])
+        for i, res in zip(idx, results):
+            graded[i].update(res)
+    return graded
+
+
+# ---------------- Contexto (usuários + motor de pontos) ----------------
+class BatchContext:
+    def __init__(self, data_path: str, audit_path: Optional[str] = None, ledger_path: Optional[str] = None,
+                 dirty_path: Optional[str] = None):
+        from app.gamification.points import PointsEngine
+        from app.utils.persistence import load_users, open_store
+        self.store = open_store(data_path)
+        self.users = load_users(self.store)  # .snap: só os usuários tocados viram User
+        self.ledger = None
+        if ledger_path:
+            from app.gamification.ledger import PointsLedger
+            self.ledger = PointsLedger(os.path.abspath(ledger_path))
+            self.ledger.reconcile(self.users.peek() if hasattr(self.users, "peek") else self.users.values())
+        self.points_engine = PointsEngine(self.ledger)
+        self.dirty = None
+        if dirty_path:
+            from app.reports.delta import DirtyTracker
+            self.dirty = DirtyTracker(os.path.abspath(dirty_path))
+            self.points_engine.attach(self.dirty)
+        self.audit = None
+        if audit_path:
+            from app.challenges.observers import AuditObserver
+            from app.utils.audit import AuditLog
+            self.audit = AuditLog(os.path.abspath(audit_path))
+            self.points_engine.attach(AuditObserver(self.audit))
+
+    def user(self, username: Optional[str], create_role: Optional[str] = None):
+        from app.core.users import FACTORIES
+        if not username:
+            return None
+        if username not in self.users and create_role:
+            self.users[username] = FACTORIES[create_role].create(username)
+            if self.dirty is not None:
+                self.dirty.mark(username)
+        return self.users.get(username)
+
+    def save(self) -> None:
+        from app.utils.persistence import users_to_dict
+        self.store.save(users_to_dict(self.users))
+
+
+def apply_result(ctx: BatchContext, sub: Dict[str, Any], res: Dict[str, Any],
+                 create_role: Optional[str] = None, double_xp: bool = False) -> None:
+    """Aplica os pontos de uma submissão corrigida ao usuário (via PointsEngine)."""
+    try:
+        streak = _parse_streak(sub.get("streak_days"))
+    except (TypeError, ValueError) as e:
+        res["error"] = f"submissão inválida: {e}"
+        return
+    user = ctx.user(res["username"], create_role)
+    if user is None:
+        res["error"] = "usuário não encontrado"
+        return
+    res["awarded"] = ctx.points_engine.award(user, res["raw_points"],
+                                             double_xp=_parse_bool(sub.get("double_xp"), double_xp),
+                                             streak_days=streak)
+    res["user_total"] = user.points
+
+
+def _write_result(out, rec: Dict[str, Any]) -> None:
+    out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+
+# ---------------- Subcomandos ----------------
+def cmd_grade(args) -> int:
+    challenges = load_challenges(args.challenges)
+    ctx = BatchContext(args.data, args.audit, args.ledger, args.dirty)
+    progress = Progress("grade", count_lines(args.input), not args.quiet)
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    stats = {"graded": 0, "errors": 0, "points": 0}
+    pool = recorder = cache = None
+    if args.record:
+        from app.utils.workload import TraceRecorder
+        recorder = TraceRecorder(args.record)
+    if args.workers > 1:
+        from app.challenges.grading_pool import GradingPool
+        pool = GradingPool(args.workers)
+    elif args.cache_size > 0:
+        from app.challenges.grading_cache import GradingCache
+        cache = GradingCache(args.cache_size)
+    try:
+        size = BATCH_SIZE if pool is None else PARALLEL_BATCH_SIZE
+        records = read_records(args.input, args.format)
+        if recorder is not None:
+            records = recorder.tap(records)  # `t` = chegada da submissão, não a aplicação do lote
+        for batch in chunked(records, size):
+            if pool is None:
+                graded = [grade_submission(sub, challenges, cache) for sub in batch]
+            else:
+                graded = grade_batch_parallel(pool, batch, challenges)
+            # aplicação dos pontos: sempre sequencial e na ordem do arquivo
+            for sub, res in zip(batch, graded):
+                if "error" not in res and not args.dry_run:
+                    apply_result(ctx, sub, res, args.create_missing, args.double_xp)
+                    stats["points"] += res.get("awarded", 0)
+                stats["errors" if "error" in res else "graded"] += 1
+                _write_result(out, res)
+            progress.advance(len(batch))
+    finally:
+        if pool is not None:
+            pool.close()
+        if recorder is not None:
+            recorder.close()
+        if out is not sys.stdout:
+            out.close()
+    progress.finish()
+    if not args.dry_run:
+        ctx.save()
+    hits = f" cache_hit={cache.hit_ratio:.1%}" if cache is not None else ""
+    print(f"corrigidas={stats['graded']} erros={stats['errors']} pontos={stats['points']}{hits}", file=sys.stderr)
+    return 1 if stats["errors"] and args.strict else 0
+
+
+def cmd_award(args) -> int:
+    ctx = BatchContext(args.data, args.audit, args.ledger, args.dirty)
+    progress = Progress("award", count_lines(args.input), not args.quiet)
+    awarded = errors = 0
+    for rec in read_records(args.input, args.format):
+        # valida o registro antes de criar o usuário (--create-missing não cria conta para linha inválida)
+        try:
+            points, streak = int(rec.get("points")), _parse_streak(rec.get("streak_days"))
+        except (TypeError, ValueError):
+            user = None
+        else:
+            user = ctx.user(rec.get("username"), args.create_missing)
+        if user is None:
+            errors += 1
+            print(f"ignorado: {rec}", file=sys.stderr)
+        else:
+            ctx.points_engine.award(user, points, double_xp=_parse_bool(rec.get("double_xp")), streak_days=streak)
+            awarded += 1
+        progress.advance()
+    progress.finish()
+    ctx.save()
+    print(f"premiados={awarded} erros={errors}", file=sys.stderr)
+    return 1 if errors and args.strict else 0
+
+
+def cmd_export(args) -> int:
+    from app.reports.facade import ReportsFacade
+    ctx = BatchContext(args.data, dirty_path=args.dirty)
+    reports = ReportsFacade()
+    if args.delta:
+        if ctx.dirty is None:
+            print("--delta requer --dirty ARQUIVO", file=sys.stderr)
+            return 2
+        paths = reports.export_delta(args.base, ctx.users, ctx.dirty, merge=args.merge)
+    else:
+        paths = reports.export_users(args.base, ctx.users, ctx.dirty)
+    for k, v in paths.items():
+        print(f"{k.upper()} => {v}")
+    return 0
+
+
+def cmd_generate(args) -> int:
+    from app.utils.workload import WorkloadConfig, WorkloadGenerator
+    cfg = WorkloadConfig(users=args.users, challenges=args.challenges, questions=(args.min_questions, args.max_questions),
+                         attempts=args.attempts, days=args.days, zipf_s=args.zipf,
+                         weekend_burst=args.weekend_burst, weekend_double_xp=args.weekend_double_xp, seed=args.seed)
+    paths = WorkloadGenerator(cfg).write(args.outdir)
+    for k, v in paths.items():
+        print(f"{k.upper()} => {v}")
+    return 0
+
+
+def cmd_replay(args) -> int:
+    from app.utils.workload import replay
+    challenges = load_challenges(args.challenges)
+    ctx = BatchContext(args.data, args.audit, args.ledger, args.dirty)
+    progress = Progress("replay", args.limit or count_lines(args.input), not args.quiet)
+    out = open(args.out, "w", encoding="utf-8") if args.out else None
+    cache = None
+    if args.cache_size > 0:
+        from app.challenges.grading_cache import GradingCache
+        cache = GradingCache(args.cache_size)
+
+    def apply(sub: Dict[str, Any]) -> Dict[str, Any]:
+        res = grade_submission(sub, challenges, cache)
+        if "error" not in res and not args.dry_run:
+            apply_result(ctx, sub, res, args.create_missing)
+        return res
+
+    admission = None
+    acks: List[Dict[str, Any]] = []
+    done: Dict[int, Dict[str, Any]] = {}
+    if args.admit:
+        # submissões só enfileiram (ack imediato); uma thread aplica correção + pontos por prioridade
+        from app.challenges.admission import AdmissionController
+        admission = AdmissionController(apply, args.queue_size, args.global_rate, user_rate=args.user_rate,
+                                        on_done=done.__setitem__).start()
+
+    def handle(sub: Dict[str, Any]) -> Dict[str, Any]:
+        if admission is None:
+            res = apply(sub)
+        else:
+            user = ctx.users.get(sub.get("username"))
+            ack = admission.submit(sub.get("username"), user.role if user else None, sub,
+                                   bulk=_parse_bool(sub.get("bulk"), args.bulk))
+            res = {"username": sub.get("username"), "ack": ack.status, "ticket": ack.ticket}
+            if not ack.accepted:
+                res["error"] = ack.reason
+            acks.append(res)
+        progress.advance()
+        return res
+
+    try:
+        stats = replay(read_records(args.input, args.format), handle, rate=args.rate, speed=args.speed,
+                       limit=args.limit,
+                       on_result=(lambda res: _write_result(out, res)) if out and admission is None else None)
+        if admission is not None:
+            # com --admit o resultado real só existe depois de drenar a fila
+            admission.stop(drain=True)
+            rows = [dict(a, **done[a["ticket"]]) if a["ticket"] in done else a for a in acks]
+            stats["rejected"] = stats["errors"]
+            stats["errors"] = sum(1 for r in rows if "error" in r)
+            if out is not None:
+                for row in rows:
+                    _write_result(out, row)
+    finally:
+        if admission is not None:
+            admission.stop(drain=True)
+        if out is not None:
+            out.close()
+    progress.finish()
+    if not args.dry_run:
+        ctx.save()
+    if cache is not None:
+        stats["cache"] = cache.stats()
+    if admission is not None:
+        stats["admission"] = admission.metrics()
+    print(json.dumps(stats, ensure_ascii=False))
+    return 1 if stats["errors"] and args.strict else 0
+
+
+def cmd_compact(args) -> int:
+    ctx = BatchContext(args.data)
+    before = os.path.getsize(args.data)
+    ctx.store.save(ctx.store.load(), compact=True)
+    after = os.path.getsize(args.data)
+    print(f"{args.data}: {before} -> {after} bytes ({len(ctx.users)} usuários)")
+    return 0
+
+
+def cmd_analytics(args) -> int:
+    from app.reports.facade import ReportsFacade
+    reports = ReportsFacade()
+    if args.base:
+        paths = reports.export_audit_report(args.base, args.audit_log, args.report, args.workers)
+        for k, v in paths.items():
+            print(f"{k.upper()} => {v}")
+    else:
+        for row in reports.audit_rows(args.audit_log, args.report, args.workers):
+            _write_result(sys.stdout, row)
+    return 0
+
+
+def cmd_stats(args) -> int:
+    from app.reports.facade import ReportsFacade
+    from app.reports.stats import CohortStats
+    ctx = BatchContext(args.data)
+    stats = CohortStats(ctx.users.values())
+    reports = ReportsFacade()
+    if args.base:
+        paths = reports.export_summary(args.base, stats, args.kind)
+        for k, v in paths.items():
+            print(f"{k.upper()} => {v}")
+    else:
+        for row in reports.summary_rows(stats, args.kind):
+            _write_result(sys.stdout, row)
+    return 0
+
+
+def cmd_convert(args) -> int:
+    from app.utils.persistence import json_to_snapshot, snapshot_to_json
+    if args.source.endswith(".snap"):
+        n = snapshot_to_json(args.source, args.target)
+    else:
+        n = json_to_snapshot(args.source, args.target)
+    print(f"{args.source} -> {args.target} ({n} usuários)")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="python -m app", description="Tarefas em lote da plataforma gamificada.")
+    ap.add_argument("--data", default=os.path.join(os.getcwd(), "data.json"),
+                    help="arquivo de usuários (data.json ou snapshot .snap)")
+    ap.add_argument("--ledger", help="livro-razão de pontos (JSON Lines) atualizado pelas premiações")
+    ap.add_argument("--dirty", help="arquivo de usuários alterados desde a última exportação (para export --delta)")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    def add_input(p):
+        p.add_argument("input", help="arquivo .jsonl ou .csv ('-' para stdin)")
+        p.add_argument("--format", choices=["jsonl", "csv"], help="formato da entrada (padrão: pela extensão)")
+        p.add_argument("--audit", help="grava eventos no audit log informado")
+        p.add_argument("--create-missing", metavar="ROLE", choices=["ALUNO", "PROFESSOR", "VISITANTE"],
+                       help="cria usuários inexistentes com o tipo informado")
+        p.add_argument("--strict", action="store_true", help="código de saída 1 se houver erros")
+        p.add_argument("-q", "--quiet", action="store_true", help="sem progresso em stderr")
+
+    p = sub.add_parser("grade", help="corrige submissões e aplica pontos")
+    add_input(p)
+    p.add_argument("--challenges", required=True, help="JSON com os desafios")
+    p.add_argument("--out", default="-", help="resultados em JSON Lines (padrão: stdout)")
+    p.add_argument("--workers", type=int, default=1,
+                   help="processos para a correção, via memória compartilhada (padrão: 1)")
+    p.add_argument("--double-xp", action="store_true", help="Double XP padrão para todas as submissões")
+    p.add_argument("--dry-run", action="store_true", help="apenas corrige, sem aplicar pontos nem salvar")
+    p.add_argument("--record", metavar="TRACE", help="grava as submissões processadas como trace para `replay`")
+    p.add_argument("--cache-size", type=int, default=4096,
+                   help="entradas do cache de correções repetidas, sem --workers (0 desliga)")
+    p.set_defaults(func=cmd_grade)
+
+    p = sub.add_parser("generate", help="gera carga sintética (data.json, challenges.json, attempts.jsonl)")
+    p.add_argument("outdir")
+    p.add_argument("--users", type=int, default=1000)
+    p.add_argument("--challenges", type=int, default=20)
+    p.add_argument("--min-questions", type=int, default=5)
+    p.add_argument("--max-questions", type=int, default=30)
+    p.add_argument("--attempts", type=int, default=10000)
+    p.add_argument("--days", type=int, default=14)
+    p.add_argument("--zipf", type=float, default=1.1, help="expoente Zipf da atividade por usuário")
+    p.add_argument("--weekend-burst", type=float, default=2.5, help="multiplicador de tentativas no fim de semana")
+    p.add_argument("--weekend-double-xp", type=float, default=0.8, help="probabilidade de Double XP no fim de semana")
+    p.add_argument("--seed", type=int, default=42)
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("replay", help="reproduz um trace de tentativas contra o motor em ritmo controlado")
+    add_input(p)
+    p.add_argument("--challenges", required=True, help="JSON com os desafios")
+    pace = p.add_mutually_exclusive_group()
+    pace.add_argument("--rate", type=float, help="tentativas por segundo (constante)")
+    pace.add_argument("--speed", type=float, default=0.0,
+                      help="fator sobre os tempos `t` do trace (1 = tempo real; padrão 0 = sem espera)")
+    p.add_argument("--limit", type=int, help="reproduz no máximo N tentativas")
+    p.add_argument("--cache-size", type=int, default=4096, help="entradas do cache de correções repetidas (0 desliga)")
+    p.add_argument("--admit", action="store_true",
+                   help="passa pela camada de admissão (fila limitada, limites de taxa, ack imediato)")
+    p.add_argument("--queue-size", type=int, default=10000, help="com --admit: tamanho máximo da fila")
+    p.add_argument("--global-rate", type=float, help="com --admit: submissões/s aceitas no total")
+    p.add_argument("--user-rate", type=float, help="com --admit: submissões/s aceitas por usuário")
+    p.add_argument("--bulk", action="store_true", help="com --admit: trata o trace como importação em lote (menor prioridade)")
+    p.add_argument("--out", help="resultados em JSON Lines")
+    p.add_argument("--dry-run", action="store_true", help="apenas corrige, sem aplicar pontos nem salvar")
+    p.set_defaults(func=cmd_replay)
+
+    p = sub.add_parser("award", help="concede pontos em lote (username, points[, double_xp, streak_days])")
+    add_input(p)
+    p.set_defaults(func=cmd_award)
+
+    p = sub.add_parser("export", help="exporta relatórios de desempenho")
+    p.add_argument("--base", default=os.path.join(os.getcwd(), "desempenho"), help="caminho base sem extensão")
+    p.add_argument("--delta", action="store_true", help="exporta apenas os usuários alterados (requer --dirty)")
+    p.add_argument("--merge", action="store_true", help="com --delta, mescla as linhas na exportação completa anterior")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("compact", help="regrava data.json sem indentação")
+    p.set_defaults(func=cmd_compact)
+
+    p = sub.add_parser("analytics", help="agrega o audit log em paralelo (pontos/dia, medalhas, eventos)")
+    p.add_argument("--audit-log", default=os.path.join(os.getcwd(), "audit.log"))
+    p.add_argument("--report", choices=["points_per_day", "medal_rate", "events"], default="points_per_day")
+    p.add_argument("--workers", type=int, default=None, help="processos (padrão: nº de CPUs)")
+    p.add_argument("--base", help="exporta CSV/JSON/PDF com este caminho base (padrão: JSON Lines no stdout)")
+    p.set_defaults(func=cmd_analytics)
+
+    p = sub.add_parser("stats", help="resumo por papel: médias, quantis, níveis e medalhas")
+    p.add_argument("--kind", choices=["roles", "levels", "medals"], default="roles")
+    p.add_argument("--base", help="exporta CSV/JSON/PDF com este caminho base (padrão: JSON Lines no stdout)")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("convert", help="converte entre data.json e snapshot binário (.snap)")
+    p.add_argument("source")
+    p.add_argument("target")
+    p.set_defaults(func=cmd_convert)
+    return ap
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "merge", False) and not args.delta:
+        parser.error("--merge só vale junto com --delta")
+    try:
+        return args.func(args)
+    except (DomainError, OSError, KeyError, ValueError) as e:
+        print(f"erro: {e}", file=sys.stderr)
+        return 2
@@ -0,0 +1,330 @@
+from __future__ import annotations
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from app.core.users import User, WriteBarrier
+
+_HIGH = "\U0010ffff"  # maior code point: limite superior de um intervalo de prefixo
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class SearchPage:
+    items: List[User]
+    total: int
+    page: int
+    page_size: int
+    suggestions: List[str] = field(default_factory=list)
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-self.total // self.page_size))
+
+
+class UserIndex:
+    """Índices de busca de usuários mantidos incrementalmente.
+
+    - prefixo: lista ordenada de (username normalizado, username) com busca binária
+    - aproximada: índice invertido de trigramas
+    - role e medalha: listas ordenadas de (username normalizado, username) por valor, para
+      paginar um filtro só de role/medalha sem varrer nem ordenar todos os candidatos
+    - pontos e nível: listas ordenadas (valor, username) para consultas por faixa
+
+    Funciona como Observer do PointsEngine: eventos de pontos/medalhas
+    reindexam apenas o usuário afetado.
+    """
+    events = ("POINTS_GAINED", "POINTS_REVERTED", "MEDAL_UNLOCKED", "MEDAL_REVOKED")
+
+    def __init__(self, users: Iterable[User] = ()):
+        self._users: Dict[str, User] = {}
+        self._state: Dict[str, Tuple[str, int, int, Tuple[str, ...]]] = {}
+        self._names: List[Tuple[str, str]] = []
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._by_role: Dict[str, List[Tuple[str, str]]] = {}
+        self._by_medal: Dict[str, List[Tuple[str, str]]] = {}
+        self._by_points: List[Tuple[int, str]] = []
+        self._by_level: List[Tuple[int, str]] = []
+        self.add_many(users)
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def __contains__(self, username: object) -> bool:
+        return username in self._users
+
+    # ---------------- Manutenção ----------------
+    def add(self, user: User) -> None:
+        if user.username in self._users:
+            self.remove(user.username)
+        name = user.username
+        self._users[name] = user
+        insort(self._names, (name.casefold(), name))
+        for tg in _trigrams(name.casefold()):
+            self._trigrams.setdefault(tg, set()).add(name)
+        self._index_state(user)
+
+    def add_many(self, users: Iterable[User]) -> None:
+        """Carga em lote (ex.: data.json): anexa tudo e ordena uma única vez."""
+        users = list(users)
+        if len(users) < 64:
+            for u in users:
+                self.add(u)
+            return
+        for u in users:
+            if u.username in self._users:
+                self.remove(u.username)
+        for u in users:
+            name = u.username
+            self._users[name] = u
+            self._names.append((name.casefold(), name))
+            for tg in _trigrams(name.casefold()):
+                self._trigrams.setdefault(tg, set()).add(name)
+            state = (u.role, u.points, u.level, tuple(u.medals))
+            self._state[name] = state
+            key = (name.casefold(), name)
+            self._by_role.setdefault(u.role, []).append(key)
+            for medal in state[3]:
+                self._by_medal.setdefault(medal, []).append(key)
+            self._by_points.append((u.points, name))
+            self._by_level.append((u.level, name))
+        for seq in (self._names, self._by_points, self._by_level, *self._by_role.values(), *self._by_medal.values()):
+            seq.sort()
+
+    def remove(self, username: str) -> None:
+        if username not in self._users:
+            return
+        self._unindex_state(username)
+        del self._users[username]
+        i = bisect_left(self._names, (username.casefold(), username))
+        if i < len(self._names) and self._names[i][1] == username:
+            del self._names[i]
+        for tg in _trigrams(username.casefold()):
+            bucket = self._trigrams.get(tg)
+            if bucket is not None:
+                bucket.discard(username)
+                if not bucket:
+                    del self._trigrams[tg]
+
+    def refresh(self, user: User) -> None:
+        """Reindexa role/pontos/nível/medalhas de um usuário que mudou."""
+        if user.username not in self._users:
+            self.add(user)
+            return
+        state = (user.role, user.points, user.level, tuple(user.medals))
+        if state != self._state[user.username]:
+            self._unindex_state(user.username)
+            self._users[user.username] = user
+            self._index_state(user)
+
+    def update(self, event: str, payload: Dict[str, Any]) -> None:
+        user = self._users.get(payload.get("username"))
+        if user is not None:
+            self.refresh(user)
+
+    def _index_state(self, user: User) -> None:
+        name = user.username
+        state = (user.role, user.points, user.level, tuple(user.medals))
+        self._state[name] = state
+        key = (name.casefold(), name)
+        insort(self._by_role.setdefault(user.role, []), key)
+        for medal in state[3]:
+            insort(self._by_medal.setdefault(medal, []), key)
+        insort(self._by_points, (user.points, name))
+        insort(self._by_level, (user.level, name))
+
+    def _unindex_state(self, name: str) -> None:
+        role, points, level, medals = self._state.pop(name)
+        self._discard(self._by_role, role, name)
+        for medal in medals:
+            self._discard(self._by_medal, medal, name)
+        for seq, value in ((self._by_points, points), (self._by_level, level)):
+            i = bisect_left(seq, (value, name))
+            if i < len(seq) and seq[i] == (value, name):
+                del seq[i]
+
+    @staticmethod
+    def _discard(index: Dict[str, List[Tuple[str, str]]], key: str, name: str) -> None:
+        bucket = index.get(key)
+        if bucket is not None:
+            entry = (name.casefold(), name)
+            i = bisect_left(bucket, entry)
+            if i < len(bucket) and bucket[i] == entry:
+                del bucket[i]
+            if not bucket:
+                del index[key]
+
+    # ---------------- Consultas ----------------
+    def _prefix_bounds(self, prefix: str) -> Tuple[int, int]:
+        p = prefix.casefold()
+        return bisect_left(self._names, (p,)), bisect_left(self._names, (p + _HIGH,))
+
+    def prefix(self, prefix: str, limit: int = 10) -> List[str]:
+        lo, hi = self._prefix_bounds(prefix)
+        return [name for _, name in self._names[lo:min(hi, lo + limit)]]
+
+    def fuzzy(self, query: str, limit: int = 5, cutoff: float = 0.6) -> List[str]:
+        """Usernames parecidos com `query` (candidatos pelos trigramas, ordenados por similaridade)."""
+        from difflib import SequenceMatcher  # só a busca aproximada precisa (fora do start-up)
+        q = query.casefold()
+        counts: Dict[str, int] = {}
+        for tg in _trigrams(q):
+            for name in self._trigrams.get(tg, ()):
+                counts[name] = counts.get(name, 0) + 1
+        candidates = sorted(counts, key=counts.get, reverse=True)[:limit * 20]
+        scored = []
+        for name in candidates:
+            ratio = SequenceMatcher(None, q, name.casefold()).ratio()
+            if ratio >= cutoff:
+                scored.append((ratio, name))
+        scored.sort(key=lambda x: (-x[0], x[1]))
+        return [name for _, name in scored[:limit]]
+
+    @staticmethod
+    def _range(seq: List[Tuple[int, str]], lo: Optional[int], hi: Optional[int]) -> Tuple[int, int]:
+        start = 0 if lo is None else bisect_left(seq, (lo,))
+        stop = len(seq) if hi is None else bisect_right(seq, (hi, _HIGH))
+        return start, stop
+
+    def search(self, prefix: Optional[str] = None, role: Optional[str] = None, medal: Optional[str] = None,
+               min_points: Optional[int] = None, max_points: Optional[int] = None,
+               min_level: Optional[int] = None, max_level: Optional[int] = None,
+               page: int = 1, page_size: int = 20) -> SearchPage:
+        """Busca paginada (ordem alfabética) combinando os filtros.
+
+        Percorre apenas a menor fonte de candidatos (faixa de prefixo, conjunto de
+        role/medalha ou faixa de pontos/nível) e testa os demais filtros por usuário.
+        """
+        page = max(1, page)
+        sources: List[Tuple[int, str, Any]] = []
+        if prefix:
+            lo, hi = self._prefix_bounds(prefix)
+            sources.append((hi - lo, "prefix", (lo, hi)))
+        if role is not None:
+            sources.append((len(self._by_role.get(role, ())), "role", self._by_role.get(role, [])))
+        if medal is not None:
+            sources.append((len(self._by_medal.get(medal, ())), "medal", self._by_medal.get(medal, [])))
+        if min_points is not None or max_points is not None:
+            lo, hi = self._range(self._by_points, min_points, max_points)
+            sources.append((hi - lo, "points", (lo, hi)))
+        if min_level is not None or max_level is not None:
+            lo, hi = self._range(self._by_level, min_level, max_level)
+            sources.append((hi - lo, "level", (lo, hi)))
+
+        start = (page - 1) * page_size
+        if len(sources) <= 1 and (not sources or sources[0][1] == "prefix"):
+            # apenas prefixo (ou nenhum filtro): fatia direta da lista ordenada
+            lo, hi = sources[0][2] if sources else (0, len(self._names))
+            names = [n for _, n in self._names[lo + start:min(hi, lo + start + page_size)]]
+            suggestions = self.fuzzy(prefix) if prefix and hi == lo else []
+            return SearchPage([self._users[n] for n in names], hi - lo, page, page_size, suggestions)
+
+        if len(sources) == 1 and sources[0][1] in ("role", "medal"):
+            # só role ou só medalha: fatia direta da lista ordenada daquele valor
+            names = sources[0][2][start:start + page_size]
+            return SearchPage([self._users[n] for _, n in names], sources[0][0], page, page_size)
+
+        sources.sort(key=lambda s: s[0])
+        _, kind, src = sources[0]
+        pcf = prefix.casefold() if prefix else None
+
+        def matches(name: str) -> bool:
+            r, pts, lvl, medals = self._state[name]
+            if pcf is not None and not name.casefold().startswith(pcf):
+                return False
+            if role is not None and r != role:
+                return False
+            if medal is not None and medal not in medals:
+                return False
+            if (min_points is not None and pts < min_points) or (max_points is not None and pts > max_points):
+                return False
+            if (min_level is not None and lvl < min_level) or (max_level is not None and lvl > max_level):
+                return False
+            return True
+
+        candidates: Iterator[str]
+        if kind == "prefix":
+            candidates = (n for _, n in self._names[src[0]:src[1]])
+        elif kind in ("points", "level"):
+            seq = self._by_points if kind == "points" else self._by_level
+            candidates = iter(sorted((n for _, n in seq[src[0]:src[1]]), key=lambda n: (n.casefold(), n)))
+        else:
+            candidates = (n for _, n in src)  # já em ordem alfabética
+        matched = [n for n in candidates if matches(n)]
+        return SearchPage([self._users[n] for n in matched[start:start + page_size]], len(matched), page, page_size)
+
+
+class IndexedUserDict(dict):
+    """Dict {username: User} que mantém um UserIndex (e índices extras, ex.: CohortStats)
+    sincronizados em inserções e remoções."""
+    def __init__(self, index: UserIndex, *args, **kwargs):
+        super().__init__()
+        self.index = index
+        self.indexes: List[Any] = [index]  # qualquer objeto com add/add_many/remove
+        self.update(*args, **kwargs)
+
+    def attach_index(self, index: Any) -> None:
+        """Passa a sincronizar `index`, carregando os usuários já presentes."""
+        self.indexes.append(index)
+        index.add_many(self.values())
+
+    def _preserve(self, username: str, new: Optional[User] = None) -> None:
+        # o objeto que sai do dict continua visível aos snapshots abertos como pré-imagem
+        old = self.get(username)
+        if old is not None and old is not new:
+            WriteBarrier.preserve(old)
+
+    def __setitem__(self, username: str, user: User) -> None:
+        self._preserve(username, user)
+        super().__setitem__(username, user)
+        for index in self.indexes:
+            index.add(user)
+
+    def __delitem__(self, username: str) -> None:
+        self._preserve(username)
+        super().__delitem__(username)
+        for index in self.indexes:
+            index.remove(username)
+
+    def update(self, *args, **kwargs) -> None:
+        items = dict(*args, **kwargs)
+        for username, user in items.items():
+            self._preserve(username, user)
+        super().update(items)
+        for index in self.indexes:
+            index.add_many(items.values())
+
+    def __ior__(self, other) -> "IndexedUserDict":
+        self.update(other)
+        return self
+
+    def setdefault(self, username: str, user: Optional[User] = None) -> User:
+        if username not in self:
+            if not isinstance(user, User):
+                raise TypeError(f"setdefault exige um User para '{username}'")
+            self[username] = user
+        return super().__getitem__(username)
+
+    def popitem(self):
+        if not self:
+            raise KeyError("popitem(): dictionary is empty")
+        username = next(reversed(self))
+        return username, self.pop(username)
+
+    def pop(self, username: str, *default):
+        if username in self:
+            self._preserve(username)
+            for index in self.indexes:
+                index.remove(username)
+        return super().pop(username, *default)
+
+    def clear(self) -> None:
+        for username in list(self):
+            self._preserve(username)
+            for index in self.indexes:
+                index.remove(username)
+        super().clear()
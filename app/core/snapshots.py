@@ -0,0 +1,135 @@
+from __future__ import annotations
+import threading, time
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional
+
+from app.core.users import User, WriteBarrier
+
+
+def _copy(user: User) -> User:
+    return User(user.username, user.role, user.points, user.level, list(user.medals))
+
+
+class UserSnapshot(Mapping):
+    """Visão somente leitura de {username: User} congelada no instante da criação.
+
+    Criar é O(1): nada é copiado. Um usuário alterado depois do snapshot tem o
+    estado anterior preservado pelo SnapshotManager (copy-on-write) na primeira
+    escrita; os demais são lidos do objeto vivo. Os valores devolvidos são cópias.
+    """
+    def __init__(self, manager: "SnapshotManager", users: Mapping, epoch: int):
+        self._manager = manager
+        self._users = users
+        self.epoch = epoch
+        self._pre: Dict[str, User] = {}  # estados anteriores à primeira escrita pós-snapshot
+        self.closed = False
+
+    def _visible(self, user: User) -> bool:
+        return getattr(user, "_born", 0) < self.epoch
+
+    def __getitem__(self, username: str) -> User:
+        pre = self._pre.get(username)
+        if pre is not None:
+            return _copy(pre)
+        user = self._users[username]
+        if not self._visible(user):
+            raise KeyError(username)
+        while True:
+            # `_wseq` ímpar: escrita em andamento. Se ela começou antes do snapshot (gancho viu
+            # nenhum snapshot aberto), espera terminar; se começou depois, a pré-imagem aparece.
+            seq = getattr(user, "_wseq", 0)
+            if not seq & 1:
+                view = _copy(user)
+                if getattr(user, "_wseq", 0) == seq:
+                    pre = self._pre.get(username)
+                    return _copy(pre) if pre is not None else view
+            else:
+                time.sleep(0)
+            pre = self._pre.get(username)
+            if pre is not None:
+                return _copy(pre)
+
+    def __iter__(self) -> Iterator[str]:
+        # list() copia as chaves de uma vez (sem "dict changed size" com inserções concorrentes)
+        for username in list(self._users):
+            user = self._users.get(username)
+            if username in self._pre or (user is not None and self._visible(user)):
+                yield username
+        # removidos do dict depois do snapshot: só existem como pré-imagem
+        for username in list(self._pre):
+            if username not in self._users:
+                yield username
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self._manager._release(self)
+
+    def __enter__(self) -> "UserSnapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class SnapshotManager:
+    """Snapshots copy-on-write dos usuários para exportações durante a pontuação.
+
+    Instala o gancho `WriteBarrier.hook`: antes de alterar um User, copia seu
+    estado para cada snapshot aberto que ainda não o tenha. Sem snapshots
+    abertos, a premiação paga só uma comparação de época. Uma escrita que passou
+    pelo gancho antes do snapshot existir é ordenada antes dele: os leitores
+    esperam o fim dela pelo contador `_wseq` do User. Usuários substituídos ou
+    removidos do dict (IndexedUserDict) também são preservados via `WriteBarrier.preserve`.
+    """
+    _instance: Optional["SnapshotManager"] = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open: List[UserSnapshot] = []
+        self.preserved = 0  # cópias feitas por copy-on-write (métrica)
+        WriteBarrier.hook = self._before_write
+
+    @classmethod
+    def instance(cls) -> "SnapshotManager":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def snapshot(self, users: Mapping) -> UserSnapshot:
+        with self._lock:
+            WriteBarrier.epoch += 1
+            snap = UserSnapshot(self, users, WriteBarrier.epoch)
+            self._open.append(snap)
+            return snap
+
+    @property
+    def open_count(self) -> int:
+        return len(self._open)
+
+    def _release(self, snap: UserSnapshot) -> None:
+        with self._lock:
+            self._open = [s for s in self._open if s is not snap]
+
+    def _before_write(self, user: User) -> None:
+        # já preservado para todos os snapshots abertos (ou nenhum aberto)
+        if not self._open or getattr(user, "_cow_epoch", 0) >= WriteBarrier.epoch:
+            return
+        with self._lock:
+            last = getattr(user, "_cow_epoch", 0)
+            copy = None
+            for snap in self._open:
+                if snap.epoch > last and user.username not in snap._pre and snap._visible(user):
+                    if copy is None:
+                        copy = _copy(user)
+                        self.preserved += 1
+                    snap._pre[user.username] = copy
+            user._cow_epoch = WriteBarrier.epoch
+
+
+def snapshot(users: Mapping) -> UserSnapshot:
+    """Atalho: snapshot O(1) de `users` pelo SnapshotManager global."""
+    return SnapshotManager.instance().snapshot(users)
@@ -1,6 +1,22 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Dict, List, Protocol
+from typing import Callable, Dict, List, Optional, Protocol
+
+class WriteBarrier:
+    """Gancho de copy-on-write (ver app/core/snapshots.py).
+
+    `epoch` avança a cada snapshot; `hook`, quando instalado, roda antes de
+    qualquer alteração de um User para preservar o estado anterior.
+    """
+    epoch: int = 0
+    hook: Optional[Callable[["User"], None]] = None
+
+    @staticmethod
+    def preserve(user: "User") -> None:
+        """Preserva `user` para os snapshots abertos antes de ele ser substituído/removido do dict."""
+        hook = WriteBarrier.hook
+        if hook is not None:
+            hook(user)
 
 @dataclass
 class User:
@@ -10,13 +26,55 @@ class User:
     level: int = 1
     medals: List[str] = field(default_factory=list)
 
+    def __post_init__(self) -> None:
+        self._born = WriteBarrier.epoch  # snapshots abertos antes da criação não veem este usuário
+        self._wseq = 0  # ímpar durante uma alteração (leitores de snapshot esperam; ver UserSnapshot)
+
+    def _before_write(self) -> None:
+        # marca a escrita antes do gancho: um snapshot criado entre o gancho e a alteração
+        # espera o fim dela em vez de copiar um estado pela metade
+        self._wseq += 1
+        hook = WriteBarrier.hook
+        if hook is not None:
+            hook(self)
+
+    def _after_write(self) -> None:
+        self._wseq += 1
+
     def add_points(self, amount: int) -> None:
-        self.points += amount
-        self.level = max(1, 1 + self.points // 100)
+        self._before_write()
+        try:
+            self.points += amount
+            self.level = max(1, 1 + self.points // 100)
+        finally:
+            self._after_write()
 
     def add_medal(self, medal: str) -> None:
         if medal not in self.medals:
-            self.medals.append(medal)
+            self._before_write()
+            try:
+                self.medals.append(medal)
+            finally:
+                self._after_write()
+
+    def remove_medal(self, medal: str) -> None:
+        if medal in self.medals:
+            self._before_write()
+            try:
+                self.medals.remove(medal)
+            finally:
+                self._after_write()
+
+    def restore(self, points: int, level: int, medals: Optional[List[str]] = None) -> None:
+        """Volta pontos/nível (e medalhas, se informadas) a um estado anterior (undo)."""
+        self._before_write()
+        try:
+            self.points = points
+            self.level = level
+            if medals is not None:
+                self.medals = list(medals)
+        finally:
+            self._after_write()
 
 class UserFactory(Protocol):
     def create(self, username: str) -> User: ...
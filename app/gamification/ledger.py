@@ -0,0 +1,167 @@
+from __future__ import annotations
+import json, os, time
+from collections import defaultdict
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+PERIODS = ("day", "week", "month")
+# tipos que contam como ganho no período (OPENING só ajusta o saldo, sem entrar nos rankings por período)
+_WINDOWED_KINDS = ("AWARD", "COMPENSATION")
+
+
+@dataclass(frozen=True)
+class LedgerEntry:
+    seq: int
+    ts: float
+    username: str
+    delta: int
+    kind: str = "AWARD"         # AWARD | COMPENSATION | OPENING
+    ref: Optional[int] = None   # seq da entrada compensada
+    period_ts: Optional[float] = None  # instante usado nos buckets (o da entrada original, na compensação)
+
+
+def bucket_key(period: str, ts: float) -> str:
+    t = time.localtime(ts)
+    if period == "day":
+        return time.strftime("%Y-%m-%d", t)
+    if period == "week":
+        return time.strftime("%G-W%V", t)
+    if period == "month":
+        return time.strftime("%Y-%m", t)
+    raise ValueError(f"período inválido: {period}")
+
+
+class PointsLedger:
+    """Livro-razão de pontos (append-only) com totais materializados por usuário.
+
+    Cada alteração de pontos vira uma entrada; desfazer gera uma entrada de
+    compensação (delta negativo) em vez de apagar histórico. Os totais por
+    usuário e por período (dia/semana/mês) são mantidos incrementalmente, e um
+    checkpoint periódico permite reconstruí-los lendo apenas o fim do arquivo.
+    """
+    def __init__(self, path: Optional[str] = None, checkpoint_every: int = 1000):
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self.entries: List[LedgerEntry] = []
+        self.totals: Dict[str, int] = defaultdict(int)
+        self.buckets: Dict[str, Dict[str, int]] = {}
+        self._seq = 0
+        self._checkpoint: Tuple[int, Dict[str, int], Dict[str, Dict[str, int]]] = (0, {}, {})
+        if path:
+            self._load()
+
+    @property
+    def checkpoint_path(self) -> Optional[str]:
+        return self.path + ".ckpt" if self.path else None
+
+    # ---------------- Escrita ----------------
+    def append(self, username: str, delta: int, kind: str = "AWARD", ref: Optional[int] = None,
+               ts: Optional[float] = None, period_ts: Optional[float] = None) -> Optional[LedgerEntry]:
+        if delta == 0:
+            return None
+        self._seq += 1
+        entry = LedgerEntry(self._seq, time.time() if ts is None else ts, username, int(delta), kind, ref, period_ts)
+        self._apply(entry)
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(entry), ensure_ascii=False) + "\n")
+        if self._seq % self.checkpoint_every == 0:
+            self.checkpoint()
+        return entry
+
+    def compensate(self, original: LedgerEntry) -> Optional[LedgerEntry]:
+        """Anula uma entrada anterior com uma entrada de sinal oposto."""
+        return self.append(original.username, -original.delta, "COMPENSATION",
+                           ref=original.seq, period_ts=original.period_ts or original.ts)
+
+    def reconcile(self, users: Iterable) -> int:
+        """Registra entradas OPENING para igualar o livro aos pontos atuais (ex.: após carregar data.json)."""
+        n = 0
+        for u in users:
+            diff = u.points - self.totals.get(u.username, 0)
+            if diff and self.append(u.username, diff, "OPENING"):
+                n += 1
+        return n
+
+    def _apply(self, entry: LedgerEntry) -> None:
+        self.entries.append(entry)
+        self.totals[entry.username] += entry.delta
+        if entry.kind not in _WINDOWED_KINDS:
+            return
+        # compensação é descontada do período da entrada original
+        ts = entry.period_ts or entry.ts
+        for period in PERIODS:
+            key = f"{period}:{bucket_key(period, ts)}"
+            bucket = self.buckets.setdefault(key, {})
+            bucket[entry.username] = bucket.get(entry.username, 0) + entry.delta
+
+    # ---------------- Leitura ----------------
+    def get(self, seq: int) -> Optional[LedgerEntry]:
+        # seq é contíguo; em memória ficam apenas as entradas posteriores ao último checkpoint
+        if not self.entries:
+            return None
+        i = seq - self.entries[0].seq
+        return self.entries[i] if 0 <= i < len(self.entries) else None
+
+    def total(self, username: str) -> int:
+        return self.totals.get(username, 0)
+
+    def period_totals(self, period: str = "week", at: Optional[float] = None) -> Dict[str, int]:
+        """Pontos ganhos no dia/semana/mês que contém `at` (agora, por padrão)."""
+        key = f"{period}:{bucket_key(period, time.time() if at is None else at)}"
+        return dict(self.buckets.get(key, {}))
+
+    def range_totals(self, start: float, end: float) -> Dict[str, int]:
+        """Soma os buckets diários entre `start` e `end` (inclusive), sem percorrer as entradas."""
+        out: Dict[str, int] = defaultdict(int)
+        first, last = bucket_key("day", start), bucket_key("day", end)
+        for key, bucket in self.buckets.items():
+            if key.startswith("day:") and first <= key[4:] <= last:
+                for u, pts in bucket.items():
+                    out[u] += pts
+        return dict(out)
+
+    def top(self, period: str = "week", limit: int = 10, at: Optional[float] = None) -> List[Dict[str, int]]:
+        rows = sorted(self.period_totals(period, at).items(), key=lambda kv: kv[1], reverse=True)
+        return [{"username": u, "points": p} for u, p in rows[:limit] if p > 0]
+
+    # ---------------- Checkpoint / reconstrução ----------------
+    def checkpoint(self) -> None:
+        self._checkpoint = (self._seq, dict(self.totals), {k: dict(v) for k, v in self.buckets.items()})
+        self.entries = []
+        if not self.path:
+            return
+        data = {"seq": self._seq, "offset": os.path.getsize(self.path), "totals": self.totals, "buckets": self.buckets}
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.checkpoint_path)
+
+    def rebuild(self) -> None:
+        """Recalcula os totais a partir do último checkpoint + entradas posteriores."""
+        _, totals, buckets = self._checkpoint
+        tail, self.entries = self.entries, []
+        self.totals = defaultdict(int, totals)
+        self.buckets = {k: dict(v) for k, v in buckets.items()}
+        for e in tail:
+            self._apply(e)
+
+    def _load(self) -> None:
+        offset = 0
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                ck = json.load(f)
+            self._seq, offset = ck["seq"], ck["offset"]
+            self.totals = defaultdict(int, ck["totals"])
+            self.buckets = ck["buckets"]
+            self._checkpoint = (self._seq, dict(self.totals), {k: dict(v) for k, v in self.buckets.items()})
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            f.seek(offset)
+            for line in f:
+                line = line.strip()
+                if line:
+                    entry = LedgerEntry(**json.loads(line))
+                    self._seq = entry.seq
+                    self._apply(entry)
@@ -1,13 +1,16 @@
 from __future__ import annotations
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from app.challenges.observers import Subject
 from app.core.users import User
 from app.gamification.decorators import BaseScore, DoubleXP, StreakBonus
+from app.gamification.ledger import LedgerEntry, PointsLedger
 
 class PointsEngine(Subject):
     """Centraliza regras de pontos e notifica conquistas (Observer)."""
-    def __init__(self):
+    def __init__(self, ledger: Optional[PointsLedger] = None):
         super().__init__()
+        self.ledger = ledger
+        self.last_entry: Optional[LedgerEntry] = None  # entrada do livro-razão gerada pelo último award
 
     def award(self, user: User, raw_points: int, *, double_xp=False, streak_days=0) -> int:
         score = BaseScore(raw_points)
@@ -17,12 +20,29 @@ class PointsEngine(Subject):
             score = StreakBonus(score, streak_days)
         pts = score.compute()
         user.add_points(pts)
-        self.notify("POINTS_GAINED", {"username": user.username, "points": pts, "total": user.points})
+        if self.ledger is not None:
+            self.last_entry = self.ledger.append(user.username, pts)
+        if self.wants("POINTS_GAINED"):
+            self.notify("POINTS_GAINED", {"username": user.username, "points": pts, "total": user.points})
         # Sample auto-medals
         if user.points >= 100 and "Iniciante 100+" not in user.medals:
             user.add_medal("Iniciante 100+")
-            self.notify("MEDAL_UNLOCKED", {"username": user.username, "medal": "Iniciante 100+"})
+            if self.wants("MEDAL_UNLOCKED"):
+                self.notify("MEDAL_UNLOCKED", {"username": user.username, "medal": "Iniciante 100+"})
         if user.points >= 500 and "Intermediário 500+" not in user.medals:
             user.add_medal("Intermediário 500+")
-            self.notify("MEDAL_UNLOCKED", {"username": user.username, "medal": "Intermediário 500+"})
+            if self.wants("MEDAL_UNLOCKED"):
+                self.notify("MEDAL_UNLOCKED", {"username": user.username, "medal": "Intermediário 500+"})
         return pts
+
+    def revert(self, user: User, entry: Optional[LedgerEntry], points: int, level: int, medals: List[str]) -> None:
+        """Desfaz uma premiação: restaura o estado anterior e registra a compensação no livro-razão."""
+        delta = points - user.points
+        if self.ledger is not None and delta:
+            if entry is not None and entry.delta == -delta:
+                self.ledger.compensate(entry)
+            else:
+                self.ledger.append(user.username, delta, "COMPENSATION", ref=entry.seq if entry else None)
+        user.restore(points, level, medals)
+        if self.wants("POINTS_REVERTED"):
+            self.notify("POINTS_REVERTED", {"username": user.username, "points": delta, "total": user.points})
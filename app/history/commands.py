@@ -1,59 +1,150 @@
 from __future__ import annotations
-from typing import Protocol, List, Optional
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Protocol, List, Optional
 from app.core.users import User
+from app.gamification.ledger import LedgerEntry, PointsLedger
 
 class Command(Protocol):
     def execute(self) -> None: ...
     def undo(self) -> None: ...
 
+class MacroCommand:
+    """Grupo de comandos executado e desfeito como uma unidade (uma única entrada no histórico).
+
+    Se um membro falhar no execute, os já executados são desfeitos em ordem
+    inversa e a exceção é propagada (tudo ou nada).
+    """
+    def __init__(self, commands: Iterable[Command] = (), label: Optional[str] = None):
+        self.label = label
+        self._pending: List[Command] = list(commands)
+        self._done: List[Command] = []
+
+    def __len__(self) -> int:
+        return len(self._done) + len(self._pending)
+
+    def run(self, cmd: Command) -> None:
+        """Executa `cmd` já como parte do grupo (usado por History.transaction)."""
+        cmd.execute()
+        self._done.append(cmd)
+
+    def execute(self) -> None:
+        pending, self._pending = self._pending, []
+        try:
+            for cmd in pending:
+                self.run(cmd)
+        except BaseException:
+            self.rollback()
+            raise
+
+    def rollback(self) -> None:
+        done, self._done = self._done, []
+        for cmd in reversed(done):
+            cmd.undo()
+
+    def undo(self) -> None:
+        self.rollback()
+
+    def describe(self) -> str:
+        return f"{self.label or 'Lote'} ({len(self)} ações)"
+
 class History:
     def __init__(self):
         self._stack: List[Command] = []
+        self._tx: Optional[MacroCommand] = None
 
     def push_and_exec(self, cmd: Command) -> None:
+        # dentro de transaction(), o comando entra no grupo em vez de ganhar entrada própria
+        if self._tx is not None:
+            self._tx.run(cmd)
+            return
         cmd.execute()
         self._stack.append(cmd)
 
+    @contextmanager
+    def transaction(self, label: Optional[str] = None) -> Iterator[MacroCommand]:
+        """Agrupa os push_and_exec do bloco em um MacroCommand.
+
+        Sai com exceção: desfaz o que o bloco já executou e propaga. Sai normal:
+        empilha o grupo como uma única entrada (desfeita de uma vez por undo_last).
+        Transações aninhadas entram na transação externa.
+        """
+        if self._tx is not None:
+            yield self._tx
+            return
+        self._tx = macro = MacroCommand(label=label)
+        try:
+            yield macro
+        except BaseException:
+            self._tx = None
+            macro.rollback()
+            raise
+        self._tx = None
+        if len(macro):
+            self._stack.append(macro)
+
     def undo_last(self) -> Optional[str]:
         if not self._stack:
             return "Nada para desfazer."
         cmd = self._stack.pop()
+        name = cmd.describe() if isinstance(cmd, MacroCommand) else cmd.__class__.__name__
         cmd.undo()
-        return f"Desfeito: {cmd.__class__.__name__}"
+        return f"Desfeito: {name}"
 
 class AwardPointsCommand:
-    def __init__(self, user: User, amount: int):
+    """Soma pontos direto no usuário; com `engine`, notifica POINTS_GAINED/POINTS_REVERTED (índices, estatísticas)."""
+    def __init__(self, user: User, amount: int, ledger: Optional[PointsLedger] = None,
+                 engine: Optional["PointsEngine"] = None):
         self.user = user
         self.amount = amount
+        self.ledger = ledger
+        self.engine = engine
+        self._entry: Optional[LedgerEntry] = None
 
     def execute(self) -> None:
         self._before = self.user.points
         self.user.add_points(self.amount)
+        if self.ledger is not None:
+            self._entry = self.ledger.append(self.user.username, self.amount)
+        if self.amount and self.engine is not None and self.engine.wants("POINTS_GAINED"):
+            self.engine.notify("POINTS_GAINED", {"username": self.user.username, "points": self.amount,
+                                                 "total": self.user.points})
 
     def undo(self) -> None:
-        self.user.points = self._before
+        # undo = entrada de compensação no livro-razão (o histórico não é apagado)
+        if self.ledger is not None and self._entry is not None:
+            self.ledger.compensate(self._entry)
+        delta = self._before - self.user.points
         # level recalculated simply
-        self.user.level = max(1, 1 + self.user.points // 100)
+        self.user.restore(self._before, max(1, 1 + self._before // 100))
+        if delta and self.engine is not None and self.engine.wants("POINTS_REVERTED"):
+            self.engine.notify("POINTS_REVERTED", {"username": self.user.username, "points": delta,
+                                                   "total": self.user.points})
 
 class AwardMedalCommand:
-    def __init__(self, user: User, medal: str):
+    """Concede uma medalha; com `engine`, notifica MEDAL_UNLOCKED/MEDAL_REVOKED aos observers."""
+    def __init__(self, user: User, medal: str, engine: Optional["PointsEngine"] = None):
         self.user = user
         self.medal = medal
+        self.engine = engine
 
     def execute(self) -> None:
         self._had = self.medal in self.user.medals
         if not self._had:
             self.user.add_medal(self.medal)
+            if self.engine is not None and self.engine.wants("MEDAL_UNLOCKED"):
+                self.engine.notify("MEDAL_UNLOCKED", {"username": self.user.username, "medal": self.medal})
 
     def undo(self) -> None:
         if not self._had and self.medal in self.user.medals:
-            self.user.medals.remove(self.medal)
+            self.user.remove_medal(self.medal)
+            if self.engine is not None and self.engine.wants("MEDAL_REVOKED"):
+                self.engine.notify("MEDAL_REVOKED", {"username": self.user.username, "medal": self.medal})
 
 from typing import Optional
 from app.gamification.points import PointsEngine
 
 class QuizAttemptCommand:
-    """Executa a premiação via PointsEngine e permite desfazer restaurando snapshot."""
+    """Executa a premiação via PointsEngine; o undo restaura o snapshot e gera compensação no livro-razão."""
     def __init__(self, user: User, engine: PointsEngine, raw_points: int, double_xp: bool, streak_days: int):
         self.user = user
         self.engine = engine
@@ -64,6 +155,7 @@ class QuizAttemptCommand:
         self._before_level: Optional[int] = None
         self._before_medals: Optional[list] = None
         self.last_awarded: Optional[int] = None
+        self._entry: Optional[LedgerEntry] = None
 
     def execute(self) -> None:
         # snapshot do estado do usuário
@@ -72,11 +164,9 @@ class QuizAttemptCommand:
         self._before_medals = list(self.user.medals)
         # premia e guarda o quanto foi realmente creditado (decorators aplicados)
         self.last_awarded = self.engine.award(self.user, self.raw_points, double_xp=self.double_xp, streak_days=self.streak_days)
+        self._entry = self.engine.last_entry
 
     def undo(self) -> None:
-        if self._before_points is not None:
-            self.user.points = self._before_points
-        if self._before_level is not None:
-            self.user.level = self._before_level
-        if self._before_medals is not None:
-            self.user.medals = list(self._before_medals)
+        if self._before_points is None:
+            return
+        self.engine.revert(self.user, self._entry, self._before_points, self._before_level, self._before_medals)
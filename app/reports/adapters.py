@@ -1,5 +1,7 @@
 from __future__ import annotations
-from typing import List, Dict, Any
+import heapq, time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import List, Dict, Any, Mapping, Optional, Tuple
 
 class ExternalRankingAPI:
     """Simula um serviço externo com formato próprio (adaptee)."""
@@ -25,3 +27,124 @@ class RankingAdapter(Leaderboard):
         raw = self.external_api.fetch_top(limit)
         # adapta para [{'username':..., 'points':...}]
         return [{"username": r["u"], "points": r["p"]} for r in raw]
+
+
+class SlowRankingAPI(ExternalRankingAPI):
+    """Serviço externo falso com latência (e falha opcional), para testar a federação."""
+    def __init__(self, rows: Optional[List[Dict[str, Any]]] = None, delay: float = 0.2, fail: bool = False):
+        self.rows = rows if rows is not None else [
+            {"u": "dave", "p": 510},
+            {"u": "alice", "p": 390},
+            {"u": "erin", "p": 260},
+        ]
+        self.delay = delay
+        self.fail = fail
+
+    def fetch_top(self, limit: int = 10) -> List[Dict[str, Any]]:
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("serviço de ranking indisponível")
+        return sorted(self.rows, key=lambda r: r["p"], reverse=True)[:limit]
+
+
+class InternalLeaderboard(Leaderboard):
+    """Ranking dos usuários locais (lido de um snapshot consistente)."""
+    def __init__(self, users: Mapping[str, Any]):
+        self.users = users
+
+    def top(self, limit: int = 10) -> List[Dict[str, Any]]:
+        from app.core.snapshots import snapshot
+        with snapshot(self.users) as view:
+            best = heapq.nlargest(limit, view.values(), key=lambda u: u.points)
+        return [{"username": u.username, "points": u.points} for u in best]
+
+
+class FederatedLeaderboard(Leaderboard):
+    """Consulta várias fontes `Leaderboard` em paralelo e junta um único top-k.
+
+    - cada fonte tem seu timeout; a chamada dura no máximo o maior deles
+    - fonte lenta/com erro: usa o último resultado bom dela (marcado "stale") ou fica de fora
+    - consulta ainda pendente de uma fonte travada não é repetida (não acumula threads);
+      as fontes recebem o maior limite já pedido e resultados menores que o top-k saem como "parcial"
+    - merge k-way (heapq.merge) das listas ordenadas; username repetido fica com a maior pontuação
+    """
+    def __init__(self, sources: Dict[str, Leaderboard], timeout: float = 0.5,
+                 timeouts: Optional[Dict[str, float]] = None):
+        self.sources = dict(sources)
+        self.timeout = timeout
+        self.timeouts = dict(timeouts or {})
+        self.status: Dict[str, Dict[str, Any]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # consulta pendente e último resultado bom de cada fonte, com o limite pedido na consulta
+        self._pending: Dict[str, Tuple[Future, int]] = {}
+        self._last_good: Dict[str, Tuple[List[Dict[str, Any]], int]] = {}
+        self._fetch_limit = 0
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=max(2, 2 * len(self.sources)),
+                                                thread_name_prefix="leaderboard")
+        return self._executor
+
+    def _fetch(self, limit: int) -> List[List[Dict[str, Any]]]:
+        start = time.monotonic()
+        # as fontes são consultadas com o maior limite já pedido: respostas atrasadas servem a qualquer top-k menor
+        self._fetch_limit = want = max(self._fetch_limit, limit)
+        futures: Dict[str, Tuple[Future, int]] = {}
+        for name, source in self.sources.items():
+            pending = self._pending.get(name)
+            if pending is not None and pending[0].done():
+                # resposta atrasada de uma chamada anterior: vira o último resultado bom
+                fut, asked = pending
+                if not fut.cancelled() and fut.exception() is None:
+                    self._last_good[name] = (sorted(fut.result(), key=lambda r: r["points"], reverse=True), asked)
+                pending = None
+            if pending is None:
+                pending = self._pending[name] = (self._pool().submit(source.top, want), want)
+            futures[name] = pending
+        lists = []
+        for name, (fut, asked) in futures.items():
+            remaining = start + self.timeouts.get(name, self.timeout) - time.monotonic()
+            try:
+                rows = fut.result(timeout=max(0.0, remaining))
+            except FutureTimeout:
+                state = "timeout"
+            except Exception as e:  # fonte com erro não derruba o ranking
+                del self._pending[name]
+                state = f"erro: {e}"
+            else:
+                del self._pending[name]
+                rows = sorted(rows, key=lambda r: r["points"], reverse=True)
+                self._last_good[name] = (rows, asked)
+                # consulta ainda pendente com limite menor (pedido maior que o anterior): top parcial
+                self.status[name] = {"state": "ok" if asked >= limit else f"ok (parcial: top {asked})",
+                                     "ms": round(1000 * (time.monotonic() - start), 1)}
+                lists.append([dict(r, source=name) for r in rows[:limit]])
+                continue
+            stale, asked = self._last_good.get(name, ([], 0))
+            if stale:
+                state += " (stale)" if asked >= limit else f" (stale, parcial: top {asked})"
+            self.status[name] = {"state": state, "ms": round(1000 * (time.monotonic() - start), 1)}
+            if stale:
+                lists.append([dict(r, source=name, stale=True) for r in stale[:limit]])
+        return lists
+
+    def top(self, limit: int = 10) -> List[Dict[str, Any]]:
+        merged = heapq.merge(*self._fetch(limit), key=lambda r: -r["points"])
+        out: List[Dict[str, Any]] = []
+        seen = set()
+        for row in merged:
+            if row["username"] in seen:
+                continue
+            seen.add(row["username"])
+            out.append(row)
+            if len(out) >= limit:
+                break
+        return out
+
+    def close(self) -> None:
+        """Encerra as threads de consulta (chamar ao sair da aplicação)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._pending.clear()
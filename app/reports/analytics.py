@@ -0,0 +1,149 @@
+from __future__ import annotations
+import json, mmap, os
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+# abaixo disso o custo de subir processos supera o ganho
+MIN_PARALLEL_BYTES = 8 * 1024 * 1024
+
+
+def split_ranges(path: str, chunks: int) -> List[Tuple[int, int]]:
+    """Divide o arquivo em até `chunks` intervalos de bytes alinhados em quebras de linha."""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    step = max(1, size // max(1, chunks))
+    bounds = [0]
+    with open(path, "rb") as f:
+        pos = step
+        while pos < size:
+            f.seek(pos)
+            f.readline()  # avança até o fim da linha corrente
+            pos = f.tell()
+            if pos >= size:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+            pos += step
+    bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+
+def _empty() -> Dict[str, Any]:
+    return {
+        "lines": 0,
+        "bad_lines": 0,
+        "events": Counter(),
+        "points_user_day": defaultdict(int),  # (username, dia) -> pontos
+        "points_user": defaultdict(int),
+        "medal_net": Counter(),               # (medalha, usuário) -> desbloqueios - revogações (undo)
+        "users": set(),
+    }
+
+
+def _parse_range(spec: Tuple[str, int, int]) -> Dict[str, Any]:
+    """Agrega as linhas JSON do intervalo [start, end) lendo o arquivo via mmap."""
+    path, start, end = spec
+    agg = _empty()
+    events, per_day, per_user, medal_net, users = (agg["events"], agg["points_user_day"], agg["points_user"],
+                                                  agg["medal_net"], agg["users"])
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = start
+        while pos < end:
+            nl = mm.find(b"\n", pos, end)
+            stop = end if nl == -1 else nl
+            line = mm[pos:stop]
+            pos = stop + 1
+            if not line.strip():
+                continue
+            agg["lines"] += 1
+            # linha malformada (JSON inválido, não-objeto, pontos não numéricos) conta em bad_lines
+            try:
+                rec = json.loads(line)
+                if not isinstance(rec, dict):
+                    raise ValueError("registro não é um objeto")
+                event = rec.get("event")
+                username = rec.get("username")
+                meta = rec.get("meta") or {}
+                if not isinstance(meta, dict):
+                    raise ValueError("meta não é um objeto")
+                pts = int(meta.get("points") or 0) if event in ("POINTS_GAINED", "POINTS_REVERTED") else 0
+            except (TypeError, ValueError):
+                agg["bad_lines"] += 1
+                continue
+            events[event] += 1
+            if username:
+                users.add(username)
+            if event in ("POINTS_GAINED", "POINTS_REVERTED") and username:
+                per_day[(username, str(rec.get("ts", ""))[:10])] += pts
+                per_user[username] += pts
+            elif event in ("MEDAL_UNLOCKED", "MEDAL_REVOKED") and username:
+                # soma comutativa: o revoke pode cair em outro intervalo que o unlock
+                medal_net[(meta.get("medal"), username)] += 1 if event == "MEDAL_UNLOCKED" else -1
+    return agg
+
+
+def merge(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    total = _empty()
+    for part in parts:
+        total["lines"] += part["lines"]
+        total["bad_lines"] += part["bad_lines"]
+        total["events"].update(part["events"])
+        for k, v in part["points_user_day"].items():
+            total["points_user_day"][k] += v
+        for k, v in part["points_user"].items():
+            total["points_user"][k] += v
+        total["medal_net"].update(part["medal_net"])
+        total["users"] |= part["users"]
+    return total
+
+
+class AuditAnalytics:
+    """Agregações sobre o audit.log (JSON lines) em paralelo por intervalos de bytes."""
+    def __init__(self, path: str, workers: Optional[int] = None):
+        self.path = path
+        self.workers = workers or os.cpu_count() or 1
+        self._result: Optional[Dict[str, Any]] = None
+
+    def run(self) -> Dict[str, Any]:
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            self._result = _empty()
+            return self._result
+        size = os.path.getsize(self.path)
+        if self.workers <= 1 or size < MIN_PARALLEL_BYTES:
+            self._result = _parse_range((self.path, 0, size))
+            return self._result
+        from concurrent.futures import ProcessPoolExecutor
+        ranges = split_ranges(self.path, self.workers * 4)
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            parts = list(pool.map(_parse_range, [(self.path, s, e) for s, e in ranges]))
+        self._result = merge(parts)
+        return self._result
+
+    @property
+    def result(self) -> Dict[str, Any]:
+        return self._result if self._result is not None else self.run()
+
+    # ---------------- Linhas de relatório ----------------
+    def points_per_user_day(self) -> List[Dict[str, Any]]:
+        rows = sorted(self.result["points_user_day"].items(), key=lambda kv: (kv[0][1], kv[0][0]))
+        return [{"day": day, "username": u, "points": pts} for (u, day), pts in rows]
+
+    def medal_unlock_rate(self) -> List[Dict[str, Any]]:
+        res = self.result
+        seen = len(res["users"]) or 1
+        holders: Counter = Counter(medal for (medal, _), net in res["medal_net"].items() if net > 0)
+        return [{"medal": medal, "users": n, "rate": round(n / seen, 4)} for medal, n in holders.most_common()]
+
+    def event_counts(self) -> List[Dict[str, Any]]:
+        return [{"event": ev, "count": n} for ev, n in self.result["events"].most_common()]
+
+    def rows(self, kind: str) -> List[Dict[str, Any]]:
+        builders = {
+            "points_per_day": self.points_per_user_day,
+            "medal_rate": self.medal_unlock_rate,
+            "events": self.event_counts,
+        }
+        if kind not in builders:
+            raise ValueError(f"relatório desconhecido: {kind}")
+        return builders[kind]()
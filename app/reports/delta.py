@@ -0,0 +1,103 @@
+from __future__ import annotations
+import json, os
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+
+class DirtyTracker:
+    """Observer que anota quais usuários mudaram desde a última exportação.
+
+    Com `path`, os nomes também são anexados a um arquivo (um por linha), para
+    que jobs em outros processos (ex.: `python -m app export --delta`) vejam as
+    alterações feitas pela CLI de correção.
+    """
+    events = ("POINTS_GAINED", "POINTS_REVERTED", "MEDAL_UNLOCKED", "MEDAL_REVOKED")
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._dirty: Set[str] = set()
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._dirty = {ln.rstrip("\n") for ln in f if ln.strip()}
+
+    def __len__(self) -> int:
+        return len(self._dirty)
+
+    def __contains__(self, username: object) -> bool:
+        return username in self._dirty
+
+    def update(self, event: str, payload: Dict[str, Any]) -> None:
+        username = payload.get("username")
+        if username:
+            self.mark(username)
+
+    def mark(self, username: str) -> None:
+        self.mark_many((username,))
+
+    def mark_many(self, usernames: Iterable[str]) -> None:
+        new = [u for u in usernames if u not in self._dirty]
+        if not new:
+            return
+        self._dirty.update(new)
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(u + "\n" for u in new))
+
+    # também funciona como índice do IndexedUserDict: cadastros e cargas marcam o usuário
+    def add(self, user: Any) -> None:
+        self.mark(user.username)
+
+    def add_many(self, users: Iterable[Any]) -> None:
+        self.mark_many(u.username for u in users)
+
+    def remove(self, username: str) -> None:
+        pass
+
+    def dirty(self) -> Set[str]:
+        return set(self._dirty)
+
+    def clear(self, usernames: Optional[Iterable[str]] = None) -> None:
+        """Limpa os usuários já exportados (todos, se `usernames` for None)."""
+        if usernames is None:
+            self._dirty.clear()
+        else:
+            self._dirty.difference_update(usernames)
+        if self.path:
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write("".join(u + "\n" for u in sorted(self._dirty)))
+            os.replace(tmp, self.path)
+
+
+class DeltaManifest:
+    """Sequência das exportações delta, gravada em `<base>.delta.json`."""
+    def __init__(self, basepath: str):
+        self.path = basepath + ".delta.json"
+        self.data: Dict[str, Any] = {"seq": 0, "full_seq": 0}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.data.update(json.load(f))
+
+    @property
+    def seq(self) -> int:
+        return int(self.data["seq"])
+
+    def next_seq(self) -> int:
+        self.data["seq"] = self.seq + 1
+        return self.seq
+
+    def mark_full(self) -> None:
+        self.data["full_seq"] = self.seq
+
+    def save(self) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+        os.replace(tmp, self.path)
+
+
+def merge_rows(previous: List[Dict[str, Any]], changed: List[Dict[str, Any]], key: str = "username") -> List[Dict[str, Any]]:
+    """Aplica as linhas alteradas sobre a exportação completa anterior (substitui pela chave, anexa novas)."""
+    by_key = {row[key]: row for row in changed}
+    merged = [by_key.pop(row[key], row) for row in previous]
+    merged.extend(by_key.values())
+    return merged
@@ -1,9 +1,17 @@
 from __future__ import annotations
-import csv, json, os
-from typing import List, Dict, Any
+import json, os
+from functools import lru_cache
+from typing import Iterable, List, Dict, Any
+
+@lru_cache(maxsize=None)
+def reportlab_available() -> bool:
+    """Verifica (uma única vez por processo) se o reportlab está instalado, sem importá-lo."""
+    import importlib.util
+    return importlib.util.find_spec("reportlab") is not None
 
 class CSVExporter:
     def export(self, path: str, rows: List[Dict[str, Any]]) -> str:
+        import csv  # carregado apenas quando há exportação CSV
         if not rows:
             rows = [{"msg": "sem dados"}]
         with open(path, "w", newline="", encoding="utf-8") as f:
@@ -19,27 +27,36 @@ class JSONExporter:
         return os.path.abspath(path)
 
 class PDFExporter:
-    def export(self, path: str, rows: List[Dict[str, Any]]) -> str:
-        try:
-            from reportlab.lib.pagesizes import A4
-            from reportlab.pdfgen import canvas
-            c = canvas.Canvas(path, pagesize=A4)
-            width, height = A4
-            y = height - 50
-            c.setFont("Helvetica", 12)
-            c.drawString(50, y, "Relatório de Desempenho")
-            y -= 30
-            for row in rows:
-                line = ", ".join(f"{k}: {v}" for k, v in row.items())
-                if y < 50:
-                    c.showPage(); y = height - 50; c.setFont("Helvetica", 12)
-                c.drawString(50, y, line[:110])
-                y -= 18
-            c.save()
-        except Exception as e:
-            # Fallback: write a pseudo-PDF (txt) to keep the flow
-            with open(path, "w", encoding="utf-8") as f:
-                f.write("Relatório (instale reportlab para PDF real)\n\n")
-                for row in rows:
-                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    """PDF em tabela. Por padrão usa o gerador embutido (streaming, sem dependências);
+    `engine="reportlab"` mantém o caminho antigo quando o reportlab está instalado."""
+    def __init__(self, engine: str = "builtin"):
+        self.engine = engine
+
+    def export(self, path: str, rows: Iterable[Dict[str, Any]]) -> str:
+        if self.engine == "reportlab" and reportlab_available():
+            rows = list(rows)  # materializa uma vez: o fallback abaixo precisa das mesmas linhas
+            try:
+                return self._export_reportlab(path, rows)
+            except Exception:
+                pass
+        from app.reports.pdfwriter import write_table_pdf
+        write_table_pdf(path, rows)
+        return os.path.abspath(path)
+
+    def _export_reportlab(self, path: str, rows: List[Dict[str, Any]]) -> str:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+        c = canvas.Canvas(path, pagesize=A4)
+        width, height = A4
+        y = height - 50
+        c.setFont("Helvetica", 12)
+        c.drawString(50, y, "Relatório de Desempenho")
+        y -= 30
+        for row in rows:
+            line = ", ".join(f"{k}: {v}" for k, v in row.items())
+            if y < 50:
+                c.showPage(); y = height - 50; c.setFont("Helvetica", 12)
+            c.drawString(50, y, line[:110])
+            y -= 18
+        c.save()
         return os.path.abspath(path)
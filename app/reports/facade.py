@@ -1,22 +1,159 @@
 from __future__ import annotations
-from typing import List, Dict, Any
-from app.reports.exporters import CSVExporter, JSONExporter, PDFExporter
-from app.reports.adapters import ExternalRankingAPI, RankingAdapter
+import json, os
+from typing import Iterable, List, Dict, Any, Mapping, Optional
 
 class ReportsFacade:
+    """Fachada de relatórios; exportadores e adapter são criados sob demanda (import tardio)."""
     def __init__(self):
-        self._csv = CSVExporter()
-        self._json = JSONExporter()
-        self._pdf = PDFExporter()
-        self._lb = RankingAdapter(ExternalRankingAPI())
+        self._csv = None
+        self._json = None
+        self._pdf = None
+        self._lb = None
+        self._federated = None
+
+    def _exporters(self):
+        if self._csv is None:
+            from app.reports.exporters import CSVExporter, JSONExporter, PDFExporter
+            self._csv, self._json, self._pdf = CSVExporter(), JSONExporter(), PDFExporter()
+        return self._csv, self._json, self._pdf
+
+    def _leaderboard(self):
+        if self._lb is None:
+            from app.reports.adapters import ExternalRankingAPI, RankingAdapter
+            self._lb = RankingAdapter(ExternalRankingAPI())
+        return self._lb
+
+    @staticmethod
+    def user_rows(users: Iterable[Any]) -> List[Dict[str, Any]]:
+        """Linhas de desempenho (uma por usuário) usadas pelos exportadores."""
+        return [{
+            "username": u.username,
+            "role": u.role,
+            "points": u.points,
+            "level": u.level,
+            "medals": ",".join(u.medals),
+        } for u in users]
 
     def export_all(self, basepath: str, rows: List[Dict[str, Any]]) -> dict:
+        csv_exp, json_exp, pdf_exp = self._exporters()
         paths = {
-            "csv": self._csv.export(basepath + ".csv", rows),
-            "json": self._json.export(basepath + ".json", rows),
-            "pdf": self._pdf.export(basepath + ".pdf", rows),
+            "csv": csv_exp.export(basepath + ".csv", rows),
+            "json": json_exp.export(basepath + ".json", rows),
+            "pdf": pdf_exp.export(basepath + ".pdf", rows),
+        }
+        return paths
+
+    @staticmethod
+    def snapshot(users: Mapping[str, Any]):
+        """Visão consistente (copy-on-write, O(1)) de `users` enquanto premiações continuam."""
+        from app.core.snapshots import snapshot
+        return snapshot(users)
+
+    def export_users(self, basepath: str, users: Mapping[str, Any], tracker: Any = None) -> dict:
+        """Exportação completa; com `tracker`, zera os usuários pendentes de exportação delta."""
+        # pendentes lidos antes do snapshot: o que mudar depois continua pendente para o próximo delta
+        pending = tracker.dirty() if tracker is not None else set()
+        if tracker is not None:
+            tracker.clear(pending)
+        try:
+            with self.snapshot(users) as view:
+                paths = self.export_all(basepath, self.user_rows(view.values()))
+        except BaseException:
+            if tracker is not None:
+                tracker.mark_many(pending)
+            raise
+        if tracker is not None:
+            from app.reports.delta import DeltaManifest
+            manifest = DeltaManifest(basepath)
+            manifest.mark_full()
+            manifest.save()
+        return paths
+
+    def export_delta(self, basepath: str, users: Mapping[str, Any], tracker: Any, merge: bool = False) -> dict:
+        """Exporta só os usuários alterados desde a última exportação, em `<base>.delta-<seq>.{csv,json}`.
+
+        Com `merge=True`, aplica as linhas sobre `<base>.json` da exportação completa anterior e
+        regrava `<base>.json`, `<base>.csv` e `<base>.pdf` a partir do resultado mesclado.
+        """
+        from app.reports.delta import DeltaManifest, merge_rows
+        changed = sorted(tracker.dirty())
+        tracker.clear(changed)
+        try:
+            with self.snapshot(users) as view:
+                rows = self.user_rows(view[u] for u in changed if u in view)
+        except BaseException:
+            tracker.mark_many(changed)
+            raise
+        manifest = DeltaManifest(basepath)
+        seq = manifest.next_seq()
+        csv_exp, json_exp, pdf_exp = self._exporters()
+        delta_base = f"{basepath}.delta-{seq:06d}"
+        delta_rows = [dict(r, seq=seq) for r in rows]
+        paths: Dict[str, Any] = {
+            "seq": seq,
+            "rows": len(rows),
+            "csv": csv_exp.export(delta_base + ".csv", delta_rows),
+            "json": json_exp.export(delta_base + ".json", delta_rows),
         }
+        if merge and os.path.exists(basepath + ".json"):
+            with open(basepath + ".json", "r", encoding="utf-8") as f:
+                merged = merge_rows(json.load(f), rows)
+            paths["merged_json"] = json_exp.export(basepath + ".json", merged)
+            paths["merged_csv"] = csv_exp.export(basepath + ".csv", merged)
+            paths["merged_pdf"] = pdf_exp.export(basepath + ".pdf", merged)
+            manifest.mark_full()
+        manifest.save()
         return paths
 
     def leaderboard(self, limit: int = 10) -> List[Dict[str, Any]]:
-        return self._lb.top(limit)
+        return self._leaderboard().top(limit)
+
+    def federation(self, users: Mapping[str, Any]):
+        """FederatedLeaderboard com as fontes padrão: interna, externa (Adapter) e um parceiro com latência."""
+        if self._federated is None or self._federated.sources["Interna"].users is not users:
+            from app.reports.adapters import (ExternalRankingAPI, FederatedLeaderboard, InternalLeaderboard,
+                                              RankingAdapter, SlowRankingAPI)
+            if self._federated is not None:
+                self._federated.close()
+            self._federated = FederatedLeaderboard({
+                "Interna": InternalLeaderboard(users),
+                "Externa": self._leaderboard(),
+                "Parceira": RankingAdapter(SlowRankingAPI(delay=0.2)),
+            }, timeout=0.5)
+        return self._federated
+
+    def federated_leaderboard(self, users: Mapping[str, Any], limit: int = 10) -> List[Dict[str, Any]]:
+        """Top-k unificado das fontes (consultadas em paralelo); ver `federation(users).status`."""
+        return self.federation(users).top(limit)
+
+    def close(self) -> None:
+        """Libera recursos abertos sob demanda (threads da federação)."""
+        if self._federated is not None:
+            self._federated.close()
+            self._federated = None
+
+    def internal_leaderboard(self, users: Mapping[str, Any], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Ranking interno por pontos sobre um snapshot consistente dos usuários."""
+        with self.snapshot(users) as view:
+            rows = sorted(view.values(), key=lambda u: u.points, reverse=True)
+        return [{"username": u.username, "points": u.points} for u in rows[:limit]]
+
+    def audit_rows(self, audit_path: str, kind: str = "points_per_day", workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Linhas agregadas do audit log (points_per_day, medal_rate ou events)."""
+        from app.reports.analytics import AuditAnalytics
+        return AuditAnalytics(audit_path, workers).rows(kind)
+
+    def export_audit_report(self, basepath: str, audit_path: str, kind: str = "points_per_day",
+                            workers: Optional[int] = None) -> dict:
+        return self.export_all(basepath, self.audit_rows(audit_path, kind, workers))
+
+    @staticmethod
+    def summary_rows(stats: Any, kind: str = "roles") -> List[Dict[str, Any]]:
+        """Resumo por papel (roles), distribuição de níveis (levels) ou medalhas (medals) de um CohortStats.
+
+        Não percorre os usuários: o custo depende só do nº de papéis/níveis/medalhas.
+        """
+        return stats.rows(kind)
+
+    def export_summary(self, basepath: str, stats: Any, kind: str = "roles") -> dict:
+        return self.export_all(basepath, self.summary_rows(stats, kind))
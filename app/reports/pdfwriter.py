@@ -0,0 +1,170 @@
+from __future__ import annotations
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Sequence
+
+# A4 em pontos
+PAGE_WIDTH = 595.28
+PAGE_HEIGHT = 841.89
+
+# larguras da Helvetica (AFM padrão, unidades de 1/1000) para ASCII 32..126
+_HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+
+
+def text_width(text: str, size: float) -> float:
+    w = 0
+    for ch in text:
+        o = ord(ch)
+        w += _HELVETICA_WIDTHS[o - 32] if 32 <= o <= 126 else 556
+    return w * size / 1000.0
+
+
+def _escape(text: str) -> bytes:
+    # WinAnsiEncoding cobre acentos do português; o resto vira '?'
+    raw = text.encode("cp1252", errors="replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)").replace(b"\r", b"").replace(b"\n", b" ")
+
+
+def _fit(text: str, width: float, size: float) -> str:
+    if text_width(text, size) <= width:
+        return text
+    while text and text_width(text + "...", size) > width:
+        text = text[:-1]
+    return text + "..."
+
+
+class PDFStreamWriter:
+    """Escreve um PDF válido de forma incremental (sem dependências externas).
+
+    Cada página é emitida e gravada assim que fica pronta; em memória ficam
+    apenas os offsets dos objetos (para a tabela xref) e os ids das páginas.
+    """
+    def __init__(self, stream: BinaryIO, page_width: float = PAGE_WIDTH, page_height: float = PAGE_HEIGHT):
+        self._f = stream
+        self.page_width = page_width
+        self.page_height = page_height
+        self._pos = 0
+        self._offsets: List[int] = []  # offsets[i] = posição do objeto i+1
+        self._page_ids: List[int] = []
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        # ids fixos: 1 catálogo, 2 árvore de páginas, 3-4 fontes (gravados no fim / agora)
+        self._catalog_id = self._reserve()
+        self._pages_id = self._reserve()
+        self._font_id = self._object(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        self._font_bold_id = self._object(
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_ids)
+
+    def _write(self, data: bytes) -> None:
+        self._f.write(data)
+        self._pos += len(data)
+
+    def _reserve(self) -> int:
+        self._offsets.append(-1)
+        return len(self._offsets)
+
+    def _object(self, body: bytes, obj_id: Optional[int] = None) -> int:
+        if obj_id is None:
+            obj_id = self._reserve()
+        self._offsets[obj_id - 1] = self._pos
+        self._write(b"%d 0 obj\n" % obj_id + body + b"\nendobj\n")
+        return obj_id
+
+    def add_page(self, content: bytes) -> None:
+        """Grava uma página com o content stream informado (operadores PDF já montados)."""
+        stream_id = self._object(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        page = (b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] "
+                b"/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> /Contents %d 0 R >>"
+                % (self._pages_id, self.page_width, self.page_height, self._font_id, self._font_bold_id, stream_id))
+        self._page_ids.append(self._object(page))
+
+    def close(self) -> None:
+        kids = b" ".join(b"%d 0 R" % i for i in self._page_ids)
+        self._object(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._page_ids)), self._pages_id)
+        self._object(b"<< /Type /Catalog /Pages %d 0 R >>" % self._pages_id, self._catalog_id)
+        xref_pos = self._pos
+        out = [b"xref\n0 %d\n" % (len(self._offsets) + 1), b"0000000000 65535 f \n"]
+        out.extend(b"%010d 00000 n \n" % off for off in self._offsets)
+        out.append(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                   % (len(self._offsets) + 1, self._catalog_id, xref_pos))
+        self._write(b"".join(out))
+
+
+class TableReport:
+    """Monta páginas de tabela (título, cabeçalho, linhas) sobre um PDFStreamWriter."""
+    def __init__(self, writer: PDFStreamWriter, title: str, columns: Sequence[str],
+                 font_size: float = 9, margin: float = 40):
+        self.w = writer
+        self.title = title
+        self.columns = list(columns)
+        self.font_size = font_size
+        self.margin = margin
+        self.line_height = font_size * 1.6
+        usable = writer.page_width - 2 * margin
+        self.col_width = usable / max(1, len(self.columns))
+        top = writer.page_height - margin - 30  # espaço do título
+        self.rows_per_page = max(1, int((top - margin - self.line_height) // self.line_height))
+        self._pending: List[Sequence[Any]] = []
+
+    def add_row(self, values: Sequence[Any]) -> None:
+        self._pending.append(values)
+        if len(self._pending) >= self.rows_per_page:
+            self._flush()
+
+    def _cell_ops(self, x: float, y: float, text: str, font: bytes) -> bytes:
+        text = _fit(text, self.col_width - 4, self.font_size)
+        return b"BT /%s %.1f Tf %.2f %.2f Td (%s) Tj ET\n" % (font, self.font_size, x, y, _escape(text))
+
+    def _flush(self) -> None:
+        if not self._pending and self.w.page_count:
+            return
+        m, fs = self.margin, self.font_size
+        y = self.w.page_height - m - 14
+        ops = [b"BT /F2 14 Tf %.2f %.2f Td (%s) Tj ET\n" % (m, y, _escape(self.title)),
+               b"BT /F1 8 Tf %.2f %.2f Td (%s) Tj ET\n"
+               % (self.w.page_width - m - 60, m / 2, _escape(f"Página {self.w.page_count + 1}"))]
+        y -= 30
+        for i, col in enumerate(self.columns):
+            ops.append(self._cell_ops(m + i * self.col_width, y, str(col), b"F2"))
+        ops.append(b"0.5 w %.2f %.2f m %.2f %.2f l S\n" % (m, y - 4, self.w.page_width - m, y - 4))
+        for n, row in enumerate(self._pending):
+            y -= self.line_height
+            if n % 2:
+                ops.append(b"0.94 g %.2f %.2f %.2f %.2f re f 0 g\n"
+                           % (m, y - fs * 0.35, self.w.page_width - 2 * m, self.line_height))
+            for i, val in enumerate(row):
+                ops.append(self._cell_ops(m + i * self.col_width, y, "" if val is None else str(val), b"F1"))
+        self.w.add_page(b"".join(ops))
+        self._pending = []
+
+    def finish(self) -> None:
+        self._flush()
+
+
+def write_table_pdf(path: str, rows: Iterable[Dict[str, Any]], title: str = "Relatório de Desempenho",
+                    columns: Optional[Sequence[str]] = None) -> int:
+    """Gera o PDF da tabela consumindo `rows` em streaming; retorna o número de páginas."""
+    it = iter(rows)
+    first = next(it, None)
+    if columns is None:
+        columns = list(first.keys()) if first else ["msg"]
+    with open(path, "wb") as f:
+        writer = PDFStreamWriter(f)
+        table = TableReport(writer, title, columns)
+        if first is None:
+            table.add_row(["sem dados"])
+        else:
+            table.add_row([first.get(c) for c in columns])
+            for row in it:
+                table.add_row([row.get(c) for c in columns])
+        table.finish()
+        writer.close()
+        return writer.page_count
@@ -0,0 +1,197 @@
+from __future__ import annotations
+import math
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.users import User
+
+# 16 sub-buckets por potência de 2: erro relativo do quantil de no máximo ~6%
+_SUB_BITS = 4
+_SUB = 1 << _SUB_BITS
+
+
+def _bucket(value: int) -> int:
+    """Índice log-linear (estilo HdrHistogram): exato até 2*_SUB, depois 16 faixas por oitava."""
+    if value < 2 * _SUB:
+        return value
+    shift = value.bit_length() - 1 - _SUB_BITS
+    return ((shift + 1) << _SUB_BITS) + (value >> shift) - _SUB
+
+
+def _bucket_bounds(index: int) -> Tuple[int, int]:
+    if index < 2 * _SUB:
+        return index, index
+    shift = (index >> _SUB_BITS) - 1
+    lo = ((index & (_SUB - 1)) + _SUB) << shift
+    return lo, lo + (1 << shift) - 1
+
+
+class QuantileHistogram:
+    """Histograma log-linear com inserção e remoção exatas (suporta undo, ao contrário de um t-digest).
+
+    Quantis custam O(nº de buckets), que cresce com log(maior valor), não com o nº de usuários.
+    """
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.total = 0
+        self.negative: Counter = Counter()  # pontos negativos (raros): guardados exatos
+
+    def add(self, value: int, n: int = 1) -> None:
+        if value < 0:
+            self.negative[value] += n
+        else:
+            self.counts[_bucket(value)] += n
+        self.total += n
+
+    def remove(self, value: int, n: int = 1) -> None:
+        table, key = (self.negative, value) if value < 0 else (self.counts, _bucket(value))
+        table[key] -= n
+        if table[key] <= 0:
+            del table[key]
+        self.total -= n
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.total <= 0:
+            return None
+        rank = max(1, math.ceil(q * self.total))
+        seen = 0
+        for value in sorted(self.negative):
+            seen += self.negative[value]
+            if seen >= rank:
+                return float(value)
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                lo, hi = _bucket_bounds(index)
+                return (lo + hi) / 2
+        return None
+
+
+class RoleStats:
+    """Agregados de um papel (ALUNO, PROFESSOR...)."""
+    def __init__(self):
+        self.count = 0
+        self.points_sum = 0
+        self.points_sq = 0
+        self.level_sum = 0
+        self.levels: Counter = Counter()
+        self.medals: Counter = Counter()
+        self.points = QuantileHistogram()
+
+    def apply(self, points: int, level: int, medals: Tuple[str, ...], sign: int) -> None:
+        self.count += sign
+        self.points_sum += sign * points
+        self.points_sq += sign * points * points
+        self.level_sum += sign * level
+        self.levels[level] += sign
+        if not self.levels[level]:
+            del self.levels[level]
+        for m in medals:
+            self.medals[m] += sign
+            if not self.medals[m]:
+                del self.medals[m]
+        if sign > 0:
+            self.points.add(points)
+        else:
+            self.points.remove(points)
+
+    def summary(self) -> Dict[str, Any]:
+        n = self.count
+        mean = self.points_sum / n if n else 0.0
+        var = max(0.0, self.points_sq / n - mean * mean) if n else 0.0
+        return {
+            "users": n,
+            "points_total": self.points_sum,
+            "points_avg": round(mean, 2),
+            "points_std": round(math.sqrt(var), 2),
+            "points_p50": self.points.quantile(0.5),
+            "points_p90": self.points.quantile(0.9),
+            "points_p99": self.points.quantile(0.99),
+            "level_avg": round(self.level_sum / n, 2) if n else 0.0,
+            "medals": sum(self.medals.values()),
+        }
+
+
+class CohortStats:
+    """Estatísticas por papel mantidas incrementalmente (Observer do PointsEngine).
+
+    Como o UserIndex, guarda o último estado visto de cada usuário; cada evento
+    (inclusive POINTS_REVERTED/MEDAL_REVOKED do undo) desconta o estado antigo e
+    soma o novo, então os relatórios de resumo não percorrem os usuários.
+    """
+    events = ("POINTS_GAINED", "POINTS_REVERTED", "MEDAL_UNLOCKED", "MEDAL_REVOKED")
+
+    def __init__(self, users: Iterable[User] = ()):
+        self._users: Dict[str, User] = {}
+        self._state: Dict[str, Tuple[str, int, int, Tuple[str, ...]]] = {}
+        self.roles: Dict[str, RoleStats] = {}
+        self.add_many(users)
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    # ---------------- Manutenção ----------------
+    def add(self, user: User) -> None:
+        if user.username in self._users:
+            self.remove(user.username)
+        self._users[user.username] = user
+        self._apply(user.username, (user.role, user.points, user.level, tuple(user.medals)), +1)
+
+    def add_many(self, users: Iterable[User]) -> None:
+        for u in users:
+            self.add(u)
+
+    def remove(self, username: str) -> None:
+        if self._users.pop(username, None) is not None:
+            self._apply(username, self._state[username], -1)
+
+    def refresh(self, user: User) -> None:
+        if user.username not in self._users:
+            self.add(user)
+            return
+        state = (user.role, user.points, user.level, tuple(user.medals))
+        old = self._state[user.username]
+        if state != old:
+            self._apply(user.username, old, -1)
+            self._users[user.username] = user
+            self._apply(user.username, state, +1)
+
+    def update(self, event: str, payload: Dict[str, Any]) -> None:
+        user = self._users.get(payload.get("username"))
+        if user is not None:
+            self.refresh(user)
+
+    def _apply(self, username: str, state: Tuple[str, int, int, Tuple[str, ...]], sign: int) -> None:
+        role, points, level, medals = state
+        stats = self.roles.get(role)
+        if stats is None:
+            stats = self.roles[role] = RoleStats()
+        stats.apply(points, level, medals, sign)
+        if sign > 0:
+            self._state[username] = state
+        else:
+            self._state.pop(username, None)
+            if not stats.count:
+                del self.roles[role]
+
+    # ---------------- Relatórios ----------------
+    def role_rows(self) -> List[Dict[str, Any]]:
+        return [dict(role=role, **self.roles[role].summary()) for role in sorted(self.roles)]
+
+    def level_rows(self) -> List[Dict[str, Any]]:
+        return [{"role": role, "level": level, "users": n}
+                for role in sorted(self.roles) for level, n in sorted(self.roles[role].levels.items())]
+
+    def medal_rows(self) -> List[Dict[str, Any]]:
+        rows = []
+        for role in sorted(self.roles):
+            stats = self.roles[role]
+            for medal, n in stats.medals.most_common():
+                rows.append({"role": role, "medal": medal, "users": n, "rate": round(n / stats.count, 4)})
+        return rows
+
+    def rows(self, kind: str = "roles") -> List[Dict[str, Any]]:
+        builders = {"roles": self.role_rows, "levels": self.level_rows, "medals": self.medal_rows}
+        if kind not in builders:
+            raise ValueError(f"resumo desconhecido: {kind}")
+        return builders[kind]()
@@ -4,29 +4,54 @@ from typing import Dict, Any, List
 
 from app.core.session import get_session
 from app.core.users import FACTORIES, User
+from app.core.search import UserIndex, IndexedUserDict
 from app.challenges.challenge import QuizChallenge
-from app.challenges.scoring import CompositeStrategy, DifficultyStrategy, AccuracyStrategy, TimeStrategy
+from app.challenges.grading_cache import GradingCache
 from app.challenges.observers import ConsoleNotifier, AuditObserver
 from app.gamification.points import PointsEngine
+from app.gamification.ledger import PointsLedger
+from app.reports.delta import DirtyTracker
+from app.reports.stats import CohortStats
 from app.gamification.achievements import Medal, MedalSet
 from app.history.commands import History, AwardPointsCommand, AwardMedalCommand, QuizAttemptCommand
-from app.reports.facade import ReportsFacade
-from app.utils.persistence import JsonStore
+from app.utils.persistence import default_data_path, load_users, open_store, users_to_dict
 from app.utils.audit import AuditLog
+from app.utils.profiler import Profiler, install_signal_toggle
 
 class ConsoleApp:
     def __init__(self):
         self.session = get_session()
-        self.users: Dict[str, User] = {}
+        self.user_index = UserIndex()
+        self.users: Dict[str, User] = IndexedUserDict(self.user_index)
+        self.stats = CohortStats()  # agregados por papel mantidos a cada cadastro/evento
+        self.users.attach_index(self.stats)
         self.challenges: Dict[str, QuizChallenge] = {}
-        self.points_engine = PointsEngine()
+        self.ledger = PointsLedger()
+        self.points_engine = PointsEngine(self.ledger)
         self.points_engine.attach(ConsoleNotifier())
+        self.points_engine.attach(self.user_index)
+        self.points_engine.attach(self.stats)
+        self.dirty = DirtyTracker()  # usuários alterados desde a última exportação
+        self.points_engine.attach(self.dirty)
+        self.users.attach_index(self.dirty)
+        self.grading = GradingCache()
         self.history = History()
-        self.reports = ReportsFacade()
-        self.store = JsonStore(os.path.join(os.getcwd(), "data.json"))
+        self._reports = None
+        self.store = open_store(default_data_path(os.getcwd()))
+        self.profiler = Profiler()
+        self.profile_path = os.path.join(os.getcwd(), "profile.collapsed")
+        install_signal_toggle(self.profiler, self.profile_path)
         self._init_demo_data()
         self._init_achievements()
 
+    @property
+    def reports(self):
+        # ReportsFacade (e exportadores) só é importado quando um relatório é pedido
+        if self._reports is None:
+            from app.reports.facade import ReportsFacade
+            self._reports = ReportsFacade()
+        return self._reports
+
     def _init_demo_data(self):
         # demo challenge
         self.challenges["quiz1"] = QuizChallenge(
@@ -51,18 +76,23 @@ class ConsoleApp:
         while True:
             print("\n=== Plataforma Gamificada (Console) ===")
             print("Usuário:", self.session.current_user.username if self.session.is_authenticated() else "(não logado)")
-            print("1) Login\n2) Cadastrar usuário\n3) Listar usuários\n4) Responder desafio\n5) Exportar relatórios\n6) Leaderboard (Adapter)\n7) Histórico/Undo\n8) Conquistas\n9) Salvar/Carregar\n0) Sair")
+            print("1) Login\n2) Cadastrar usuário\n3) Listar usuários\nB) Buscar usuários\n4) Responder desafio\n5) Exportar relatórios\n6) Leaderboard (Adapter)\n7) Histórico/Undo\n8) Conquistas\nE) Estatísticas por papel\n9) Salvar/Carregar\nP) Profiler (liga/desliga)\n0) Sair")
             op = input("> ").strip()
             if op == "1": self.menu_login()
             elif op == "2": self.menu_cadastrar()
             elif op == "3": self.menu_listar()
+            elif op.upper() == "B": self.menu_buscar()
             elif op == "4": self.menu_responder()
             elif op == "5": self.menu_exportar()
             elif op == "6": self.menu_leaderboard()
             elif op == "7": self.menu_history()
             elif op == "8": self.menu_conquistas()
+            elif op.upper() == "E": self.menu_estatisticas()
             elif op == "9": self.menu_persistencia()
+            elif op.upper() == "P": self.menu_profiler()
             elif op == "0": break
+        if self._reports is not None:
+            self._reports.close()
 
     def menu_login(self):
         u = input("Usuário: ").strip()
@@ -71,6 +101,9 @@ class ConsoleApp:
             print("Logado como:", u, self.users[u].role)
         else:
             print("Usuário não encontrado.")
+            sugestoes = self.user_index.fuzzy(u) if u else []
+            if sugestoes:
+                print("Você quis dizer:", ", ".join(sugestoes))
 
     def menu_cadastrar(self):
         u = input("Novo usuário: ").strip()
@@ -84,6 +117,29 @@ class ConsoleApp:
         for u, obj in self.users.items():
             print(f"- {u} | {obj.role} | pontos={obj.points} | lvl={obj.level} | medals={obj.medals}")
 
+    def menu_buscar(self):
+        prefix = input("Prefixo do usuário (vazio = todos): ").strip() or None
+        role = input("Tipo (ALUNO/PROFESSOR/VISITANTE, vazio = todos): ").strip().upper() or None
+        medal = input("Medalha (vazio = qualquer): ").strip() or None
+        faixa = input("Pontos mín-máx (ex.: 100-500, vazio = qualquer): ").strip()
+        min_pts = max_pts = None
+        if faixa:
+            lo, _, hi = faixa.partition("-")
+            min_pts = int(lo) if lo.strip() else None
+            max_pts = int(hi) if hi.strip() else None
+        page = 1
+        while True:
+            res = self.user_index.search(prefix=prefix, role=role, medal=medal, min_points=min_pts,
+                                         max_points=max_pts, page=page, page_size=20)
+            for obj in res.items:
+                print(f"- {obj.username} | {obj.role} | pontos={obj.points} | lvl={obj.level} | medals={obj.medals}")
+            print(f"{res.total} resultado(s) - página {res.page}/{res.pages}")
+            if res.suggestions:
+                print("Você quis dizer:", ", ".join(res.suggestions))
+            if page >= res.pages or input("Próxima página? (s/n): ").strip().lower() != "s":
+                break
+            page += 1
+
     def menu_responder(self):
         if not self.session.is_authenticated():
             print("Faça login primeiro."); return
@@ -100,14 +156,8 @@ class ConsoleApp:
             ans = int(input("Sua resposta (número): ").strip() or "-1")
             answers.append(ans)
         elapsed = time.time() - start
-        result = ch.evaluate(answers)
-        context = {
-            "difficulty": ch.difficulty,
-            "accuracy": result["accuracy"],
-            "time_sec": elapsed,
-        }
-        strat = CompositeStrategy(DifficultyStrategy(), AccuracyStrategy(), TimeStrategy())
-        raw_pts = strat.score(context)
+        result = self.grading.grade(ch, answers, elapsed)
+        raw_pts = result["raw_points"]
         print(f"Pontuação base calculada: {raw_pts}")
         dbl = input("Aplicar Double XP? (s/n): ").strip().lower() == 's'
         streak = int(input("Dias de streak (0 para nenhum): ").strip() or "0")
@@ -115,30 +165,38 @@ class ConsoleApp:
         earned = self.points_engine.award(self.users[self.session.current_user.username], raw_pts, double_xp=dbl, streak_days=streak)
         print("Pontos recebidos:", earned)
         # registrar comandos no histórico
-        self.history.push_and_exec(AwardPointsCommand(self.users[self.session.current_user.username], 0))  # marcador
+        self.history.push_and_exec(AwardPointsCommand(self.users[self.session.current_user.username], 0, self.ledger,
+                                                      self.points_engine))  # marcador
         print("Resultado:", result)
 
     def menu_exportar(self):
-        rows = [{
-            "username": u.username,
-            "role": u.role,
-            "points": u.points,
-            "level": u.level,
-            "medals": ",".join(u.medals),
-        } for u in self.users.values()]
+        print(f"1) Completo  |  2) Delta ({len(self.dirty)} alterados)  |  3) Delta + mesclar na exportação completa")
+        op = input("> ").strip()
         base = os.path.join(os.getcwd(), "desempenho")
-        paths = self.reports.export_all(base, rows)
+        if op in ("2", "3"):
+            paths = self.reports.export_delta(base, self.users, self.dirty, merge=(op == "3"))
+        else:
+            paths = self.reports.export_users(base, self.users, self.dirty)
         for k, v in paths.items():
             print(f"{k.upper()} => {v}")
 
     def menu_leaderboard(self):
-        top = self.reports.leaderboard(10)
-        print("TOP (externo adaptado):")
+        federada = input("1) Externo (Adapter)  |  2) Federado (interno + externos) : ").strip() == "2"
+        if federada:
+            top = self.reports.federated_leaderboard(self.users, 10)
+            print("TOP (federado):")
+        else:
+            top = self.reports.leaderboard(10)
+            print("TOP (externo adaptado):")
         for i, row in enumerate(top, 1):
-            print(f"{i:02d}. {row['username']} - {row['points']} pts")
+            print(f"{i:02d}. {row['username']} - {row['points']} pts" + (f" [{row['source']}]" if federada else ""))
+        if federada:
+            for name, st in self.reports.federation(self.users).status.items():
+                print(f"  fonte {name}: {st['state']} ({st['ms']} ms)")
 
     def menu_history(self):
-        print("1) Desfazer última ação  |  2) Premiar medalha (comando)  |  3) Ver audit log (últimos 20)")
+        print("1) Desfazer última ação  |  2) Premiar medalha (comando)  |  3) Ver audit log (últimos 20)"
+              "  |  4) Medalha para todos de um tipo (lote)")
         op = input("> ").strip()
         if op == "1":
             print(self.history.undo_last())
@@ -146,28 +204,50 @@ class ConsoleApp:
             if not self.session.is_authenticated():
                 print("Faça login primeiro."); return
             medal = input("Medalha: ").strip()
-            cmd = AwardMedalCommand(self.users[self.session.current_user.username], medal)
+            cmd = AwardMedalCommand(self.users[self.session.current_user.username], medal, self.points_engine)
             self.history.push_and_exec(cmd)
             print("Medalha concedida (pode desfazer em 'Desfazer').")
+        elif op == "4":
+            medal = input("Medalha: ").strip()
+            role = input("Tipo (ALUNO/PROFESSOR/VISITANTE): ").strip().upper()
+            alvo = [u for u in self.users.values() if u.role == role]
+            # transação: um único item no histórico; qualquer falha desfaz o lote inteiro
+            with self.history.transaction(f"Medalha '{medal}' para {role}") as tx:
+                for u in alvo:
+                    self.history.push_and_exec(AwardMedalCommand(u, medal, self.points_engine))
+            print(f"{len(tx)} usuário(s) premiado(s); 'Desfazer' reverte o lote de uma vez.")
 
     def menu_conquistas(self):
         print(f"Conjunto: {self.ach_tree.name()}  | total de medalhas: {self.ach_tree.total_medals()}" )
         for m in self.ach_tree.list_medals():
             print("-", m)
 
+    def menu_estatisticas(self):
+        for row in self.reports.summary_rows(self.stats, "roles"):
+            print(f"{row['role']:<10} usuários={row['users']:<6} média={row['points_avg']:<9} "
+                  f"p50={row['points_p50']} p90={row['points_p90']} nível médio={row['level_avg']} medalhas={row['medals']}")
+        if input("Exportar resumo (roles/levels/medals)? (s/n): ").strip().lower() == "s":
+            base = os.path.join(os.getcwd(), "resumo")
+            for kind in ("roles", "levels", "medals"):
+                paths = self.reports.export_summary(f"{base}_{kind}", self.stats, kind)
+                print(f"{kind}: {paths['csv']}")
+
+    def menu_profiler(self):
+        if not self.profiler.running:
+            op = input("Modo: 1) Amostragem (leve)  |  2) Determinístico (preciso, mais caro) [1]: ").strip()
+            self.profiler.start("deterministic" if op == "2" else "sampling")
+            print(f"Profiler ({self.profiler.mode}) iniciado. Use 'P' novamente para parar.")
+            return
+        self.profiler.stop()
+        print(self.profiler.report())
+        print("Pilhas (flamegraph) =>", self.profiler.write_collapsed(self.profile_path))
+
     def menu_persistencia(self):
         print("1) Salvar  |  2) Carregar")
         op = input("> ").strip()
         if op == "1":
-            data = {u: {"role": obj.role, "points": obj.points, "level": obj.level, "medals": obj.medals} for u, obj in self.users.items()}
-            self.store.save(data); print("OK salvo.")
+            self.store.save(users_to_dict(self.users)); print("OK salvo.")
         else:
-            raw = self.store.load()
-            for u, info in raw.items():
-                factory = FACTORIES.get(info.get("role", "ALUNO"))
-                if factory:
-                    self.users[u] = factory.create(u)
-                    self.users[u].points = info.get("points", 0)
-                    self.users[u].level = info.get("level", 1)
-                    self.users[u].medals = info.get("medals", [])
+            self.users.update(load_users(self.store))
+            self.ledger.reconcile(self.users.values())
             print("OK carregado.")
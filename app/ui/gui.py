@@ -1,20 +1,25 @@
 from __future__ import annotations
-import os
+import os, threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog  # filedialog pode ser útil depois
 from typing import Dict, List
 
 from app.core.session import get_session
 from app.core.users import FACTORIES, User
+from app.core.search import UserIndex, IndexedUserDict
 from app.challenges.challenge import QuizChallenge
-from app.challenges.scoring import CompositeStrategy, DifficultyStrategy, AccuracyStrategy, TimeStrategy
+from app.challenges.grading_cache import GradingCache
+from app.challenges.admission import AdmissionController
 from app.challenges.observers import ConsoleNotifier, AuditObserver
 from app.gamification.points import PointsEngine
+from app.gamification.ledger import PointsLedger
+from app.reports.delta import DirtyTracker
+from app.reports.stats import CohortStats
 from app.gamification.achievements import Medal, MedalSet
 from app.history.commands import History, AwardMedalCommand, QuizAttemptCommand
-from app.reports.facade import ReportsFacade
-from app.utils.persistence import JsonStore
+from app.utils.persistence import default_data_path, load_users, open_store, users_to_dict
 from app.utils.audit import AuditLog
+from app.utils.profiler import Profiler, install_signal_toggle
 
 
 class AppGUI(tk.Tk):
@@ -25,18 +30,37 @@ class AppGUI(tk.Tk):
 
         # Estado / serviços
         self.session = get_session()
-        self.users: Dict[str, User] = {}
+        self.user_index = UserIndex()
+        self.users: Dict[str, User] = IndexedUserDict(self.user_index)
+        self.stats = CohortStats()  # agregados por papel mantidos a cada cadastro/evento
+        self.users.attach_index(self.stats)
         self.challenges: Dict[str, QuizChallenge] = {}
-        self.points_engine = PointsEngine()
+        self.ledger = PointsLedger()
+        self.points_engine = PointsEngine(self.ledger)
         self.points_engine.attach(ConsoleNotifier())
+        self.points_engine.attach(self.user_index)
+        self.points_engine.attach(self.stats)
+        self.dirty = DirtyTracker()  # usuários alterados desde a última exportação
+        self.points_engine.attach(self.dirty)
+        self.users.attach_index(self.dirty)
+        self.grading = GradingCache()
+        # fila limitada + limite por usuário (cliques repetidos) na frente da premiação
+        self.admission = AdmissionController(self._apply_quiz, max_queue=100, user_rate=1.0, user_burst=3)
+        self._quiz_tickets = []  # tickets na fila cujo resultado ainda não foi conferido
         self.audit = AuditLog(os.path.join(os.getcwd(), "audit.log"))
         self.points_engine.attach(AuditObserver(self.audit))
         self.history = History()
-        self.reports = ReportsFacade()
-        self.store = JsonStore(os.path.join(os.getcwd(), "data.json"))
+        self._reports = None
+        self.store = open_store(default_data_path(os.getcwd()))
+        self.profiler = Profiler()
+        self.profile_path = os.path.join(os.getcwd(), "profile.collapsed")
+        install_signal_toggle(self.profiler, self.profile_path)
         self._init_demo_data()
         self._init_achievements()
 
+        self._lb_job = None  # consulta federada em andamento (thread)
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
         # UI
         self._build_menu()
         self._build_header()
@@ -45,6 +69,14 @@ class AppGUI(tk.Tk):
         self._refresh_achievements()
         self._refresh_audit()
 
+    @property
+    def reports(self):
+        # ReportsFacade (e exportadores) só é importado quando um relatório é pedido
+        if self._reports is None:
+            from app.reports.facade import ReportsFacade
+            self._reports = ReportsFacade()
+        return self._reports
+
     # ---------------- State bootstrap ----------------
     def _init_demo_data(self):
         # Quiz avançado com pesos por questão
@@ -97,15 +129,28 @@ class AppGUI(tk.Tk):
         m_file.add_command(label="Carregar", command=self._load_data)
         m_file.add_separator()
         m_file.add_command(label="Exportar Relatórios", command=self._export_reports)
+        m_file.add_command(label="Exportar Delta (alterados)", command=self._export_delta)
         m_file.add_separator()
-        m_file.add_command(label="Sair", command=self.destroy)
+        m_file.add_command(label="Sair", command=self._on_close)
         menubar.add_cascade(label="Arquivo", menu=m_file)
 
         # Ações
         m_actions = tk.Menu(menubar, tearoff=0)
         m_actions.add_command(label="Desfazer (Undo)", command=self._undo_last)
+        m_actions.add_command(label="Medalha para um tipo de usuário (lote)...", command=self._award_medal_bulk)
         menubar.add_cascade(label="Ações", menu=m_actions)
 
+        # Ferramentas
+        m_tools = tk.Menu(menubar, tearoff=0)
+        m_tools.add_command(label="Iniciar/Parar Profiler", command=self._toggle_profiler)
+        m_mode = tk.Menu(m_tools, tearoff=0)
+        self.var_profiler_mode = tk.StringVar(value=self.profiler.mode)
+        m_mode.add_radiobutton(label="Amostragem (leve)", variable=self.var_profiler_mode, value="sampling")
+        m_mode.add_radiobutton(label="Determinístico (preciso)", variable=self.var_profiler_mode, value="deterministic")
+        m_tools.add_cascade(label="Modo do Profiler", menu=m_mode)
+        m_tools.add_command(label="Estatísticas por papel", command=self._show_stats)
+        menubar.add_cascade(label="Ferramentas", menu=m_tools)
+
         self.config(menu=menubar)
 
     def _build_header(self):
@@ -147,6 +192,23 @@ class AppGUI(tk.Tk):
 
     # ----- Users Tab -----
     def _build_users_tab(self, parent):
+        search = ttk.Frame(parent); search.pack(fill="x", pady=(0, 6))
+        ttk.Label(search, text="Buscar:").pack(side="left")
+        self.var_user_search = tk.StringVar()
+        ent = ttk.Entry(search, textvariable=self.var_user_search, width=24); ent.pack(side="left", padx=5)
+        ent.bind("<KeyRelease>", lambda e: self._search_users())
+        ttk.Label(search, text="Tipo:").pack(side="left")
+        self.var_user_role = tk.StringVar(value="Todos")
+        cb = ttk.Combobox(search, textvariable=self.var_user_role, values=["Todos", *FACTORIES.keys()],
+                          state="readonly", width=12)
+        cb.pack(side="left", padx=5)
+        cb.bind("<<ComboboxSelected>>", lambda e: self._search_users())
+        ttk.Button(search, text="<", width=3, command=lambda: self._user_page_step(-1)).pack(side="left", padx=(10, 2))
+        ttk.Button(search, text=">", width=3, command=lambda: self._user_page_step(1)).pack(side="left")
+        self.lbl_user_page = ttk.Label(search, text="")
+        self.lbl_user_page.pack(side="left", padx=8)
+        self._user_page = 1
+
         cols = ("username", "role", "points", "level", "medals")
         self.tree_users = ttk.Treeview(parent, columns=cols, show="headings", height=16)
         for c in cols:
@@ -159,11 +221,28 @@ class AppGUI(tk.Tk):
         ttk.Button(btns, text="Salvar", command=self._save_data).pack(side="left", padx=5)
         ttk.Button(btns, text="Carregar", command=self._load_data).pack(side="left", padx=5)
 
+    def _search_users(self):
+        self._user_page = 1
+        self._refresh_user_table()
+
+    def _user_page_step(self, step: int):
+        self._user_page = max(1, self._user_page + step)
+        self._refresh_user_table()
+
     def _refresh_user_table(self):
         for i in self.tree_users.get_children():
             self.tree_users.delete(i)
-        for u in self.users.values():
+        role = self.var_user_role.get()
+        res = self.user_index.search(prefix=self.var_user_search.get().strip() or None,
+                                     role=None if role == "Todos" else role,
+                                     page=self._user_page, page_size=200)
+        if res.page > res.pages:
+            self._user_page = res.pages
+            return self._refresh_user_table()
+        for u in res.items:
             self.tree_users.insert("", "end", values=(u.username, u.role, u.points, u.level, ",".join(u.medals)))
+        extra = f" | sugestões: {', '.join(res.suggestions)}" if res.suggestions else ""
+        self.lbl_user_page.config(text=f"{res.total} usuário(s) - página {res.page}/{res.pages}{extra}")
 
     # ----- Quiz Tab -----
     def _build_quiz_tab(self, parent):
@@ -213,18 +292,46 @@ class AppGUI(tk.Tk):
         if not ch:
             return
         answers = [v.get() for v in self.quiz_vars]
-        result = ch.evaluate(answers)
-
-        # Build score using Strategy
         import time
         start = time.time(); time.sleep(0.05)  # simula um pequeno tempo de resposta
         elapsed = time.time() - start
-        strat = CompositeStrategy(DifficultyStrategy(), AccuracyStrategy(), TimeStrategy())
-        raw_pts = strat.score({"difficulty": ch.difficulty, "accuracy": result["accuracy"], "time_sec": elapsed})
 
-        user = self.users[self.session.current_user.username]
-        dbl = self.var_double.get()
-        streak = int(self.var_streak.get())
+        # Admissão: enfileira e responde na hora; a premiação é aplicada em seguida por _drain_submissions
+        current = self.session.current_user
+        ack = self.admission.submit(current.username, current.role, {
+            "username": current.username, "challenge_id": ch.id, "answers": answers, "time_sec": elapsed,
+            "double_xp": self.var_double.get(), "streak_days": int(self.var_streak.get())})
+        if not ack.accepted:
+            messagebox.showwarning("Quiz", f"Submissão recusada ({ack.reason}). Tente novamente em instantes.")
+            return
+        self.lbl_quiz_result.config(text=f"Na fila (ticket {ack.ticket}, {ack.queue_depth} aguardando)...")
+        self._quiz_tickets.append(ack.ticket)
+        self.after(10, self._drain_submissions)
+
+    def _drain_submissions(self):
+        self.admission.process(max_items=20)
+        pending = []
+        for ticket in self._quiz_tickets:
+            res = self.admission.result(ticket)
+            if res is None:
+                pending.append(ticket)
+            elif "error" in res:
+                self.lbl_quiz_result.config(text=f"Falha na submissão (ticket {ticket}): {res['error']}")
+                messagebox.showerror("Quiz", f"Não foi possível aplicar a submissão: {res['error']}")
+        self._quiz_tickets = pending
+        if self.admission.metrics()["queue_depth"]:
+            self.after(10, self._drain_submissions)
+
+    def _apply_quiz(self, sub):
+        ch = self.challenges[sub["challenge_id"]]
+        elapsed = sub["time_sec"]
+        # Build score using Strategy (evaluate + parte fixa vêm do cache de correções)
+        result = self.grading.grade(ch, sub["answers"], elapsed)
+        raw_pts = result["raw_points"]
+
+        user = self.users[sub["username"]]
+        dbl = sub["double_xp"]
+        streak = sub["streak_days"]
 
         # Log de alto nível
         self.audit.add("QUIZ_ANSWERED", user.username, {"challenge_id": ch.id, "accuracy": result["accuracy"], "time_sec": int(elapsed)})
@@ -240,6 +347,7 @@ class AppGUI(tk.Tk):
         self._refresh_lb()            # <- atualiza leaderboard após pontuar
         self._refresh_audit()
         messagebox.showinfo("Quiz", "Respostas enviadas e pontuação aplicada!")
+        return result
 
     # ----- Leaderboard Tab -----
     def _build_lb_tab(self, parent):
@@ -249,7 +357,7 @@ class AppGUI(tk.Tk):
         ttk.Label(src_frame, text="Fonte:").pack(side="left")
         self.var_lb_source = tk.StringVar(value="Interna")
         cb = ttk.Combobox(src_frame, textvariable=self.var_lb_source,
-                          values=["Interna", "Externa"], state="readonly", width=12)
+                          values=["Interna", "Semanal", "Mensal", "Externa", "Federada"], state="readonly", width=12)
         cb.pack(side="left", padx=6)
         cb.bind("<<ComboboxSelected>>", lambda e: self._refresh_lb())
 
@@ -260,20 +368,59 @@ class AppGUI(tk.Tk):
             self.tree_lb.column(c, width=120, anchor="center" if c == "pos" else "w")
         self.tree_lb.pack(fill="both", expand=True, padx=5, pady=5)
 
+        self.lbl_lb_status = ttk.Label(parent, text="")
+        self.lbl_lb_status.pack(anchor="w", padx=10)
         ttk.Button(parent, text="Atualizar Leaderboard", command=self._refresh_lb)\
             .pack(anchor="e", padx=10, pady=8)
 
     def _internal_lb(self):
-        rows = sorted(self.users.values(), key=lambda u: u.points, reverse=True)
-        return [{"username": u.username, "points": u.points} for u in rows]
+        return self.reports.internal_leaderboard(self.users)
 
     def _refresh_lb(self):
+        source = self.var_lb_source.get()
+        if source == "Federada":
+            self._refresh_federated()
+            return
+        if source == "Interna":
+            rows = self._internal_lb()
+        elif source == "Semanal":
+            rows = self.ledger.top("week", 10)
+        elif source == "Mensal":
+            rows = self.ledger.top("month", 10)
+        else:
+            rows = self.reports.leaderboard(10)
+        self._fill_lb(rows, {})
+
+    def _fill_lb(self, rows, status):
         for i in self.tree_lb.get_children():
             self.tree_lb.delete(i)
-        rows = self._internal_lb() if self.var_lb_source.get() == "Interna" else self.reports.leaderboard(10)
+        self.lbl_lb_status.config(text=" | ".join(f"{n}: {st['state']} ({st['ms']} ms)" for n, st in status.items()))
         for i, row in enumerate(rows, 1):
             self.tree_lb.insert("", "end", values=(i, row["username"], row["points"]))
 
+    def _refresh_federated(self):
+        # o fan-out (até o timeout das fontes) roda fora do mainloop; a árvore é preenchida ao terminar
+        if self._lb_job is not None:
+            return  # consulta anterior ainda em andamento: não empilha outra
+        box = {}
+
+        def work():
+            fed = self.reports.federation(self.users)
+            box["rows"], box["status"] = fed.top(10), dict(fed.status)
+
+        def poll():
+            if self._lb_job.is_alive():
+                self.after(50, poll)
+                return
+            self._lb_job = None
+            if self.var_lb_source.get() == "Federada":
+                self._fill_lb(box.get("rows", []), box.get("status", {}))
+
+        self._lb_job = threading.Thread(target=work, name="federated-lb", daemon=True)
+        self._lb_job.start()
+        self.lbl_lb_status.config(text="Consultando fontes...")
+        self.after(50, poll)
+
     # ----- Achievements Tab -----
     def _build_ach_tab(self, parent):
         self.lbl_ach_summary = ttk.Label(parent, text="Conquistas: -")
@@ -307,13 +454,17 @@ class AppGUI(tk.Tk):
     def _open_login_dialog(self):
         dlg = tk.Toplevel(self); dlg.title("Login"); dlg.geometry("320x150"); dlg.transient(self); dlg.grab_set()
         ttk.Label(dlg, text="Usuário:").pack(anchor="w", padx=10, pady=(10, 4))
-        var_user = tk.StringVar(); ent = ttk.Entry(dlg, textvariable=var_user); ent.pack(fill="x", padx=10)
+        var_user = tk.StringVar(); ent = ttk.Combobox(dlg, textvariable=var_user); ent.pack(fill="x", padx=10)
         ent.focus_set()
+        # type-ahead: sugere usernames pelo prefixo digitado
+        ent.bind("<KeyRelease>", lambda e: ent.configure(values=self.user_index.prefix(var_user.get().strip(), 10)))
 
         def do_login():
             u = var_user.get().strip()
             if u not in self.users:
-                messagebox.showerror("Login", "Usuário não encontrado."); return
+                sugestoes = self.user_index.fuzzy(u) if u else []
+                extra = f"\nVocê quis dizer: {', '.join(sugestoes)}" if sugestoes else ""
+                messagebox.showerror("Login", "Usuário não encontrado." + extra); return
             self.session.login(u, self.users[u].role)
             self.lbl_user.config(text=f"{u} ({self.users[u].role})")
             dlg.destroy()
@@ -343,35 +494,27 @@ class AppGUI(tk.Tk):
         ttk.Button(dlg, text="Cadastrar", command=do_register).pack(pady=12)
 
     def _save_data(self):
-        data = {u: {"role": obj.role, "points": obj.points, "level": obj.level, "medals": obj.medals}
-                for u, obj in self.users.items()}
-        self.store.save(data)
+        self.store.save(users_to_dict(self.users))
         messagebox.showinfo("Salvar", "Dados salvos em data.json.")
 
     def _load_data(self):
-        raw = self.store.load()
-        for u, info in raw.items():
-            factory = FACTORIES.get(info.get("role", "ALUNO"))
-            if factory:
-                self.users[u] = factory.create(u)
-                self.users[u].points = info.get("points", 0)
-                self.users[u].level = info.get("level", 1)
-                self.users[u].medals = info.get("medals", [])
+        self.users.update(load_users(self.store))
+        self.ledger.reconcile(self.users.values())
         self._refresh_user_table()
         messagebox.showinfo("Carregar", "Dados carregados de data.json.")
 
     def _export_reports(self):
-        rows = [{
-            "username": u.username,
-            "role": u.role,
-            "points": u.points,
-            "level": u.level,
-            "medals": ",".join(u.medals),
-        } for u in self.users.values()]
         base = os.path.join(os.getcwd(), "desempenho")
-        paths = self.reports.export_all(base, rows)
+        paths = self.reports.export_users(base, self.users, self.dirty)
         messagebox.showinfo("Exportação", f"CSV: {paths['csv']}\nJSON: {paths['json']}\nPDF: {paths['pdf']}")
 
+    def _export_delta(self):
+        base = os.path.join(os.getcwd(), "desempenho")
+        paths = self.reports.export_delta(base, self.users, self.dirty, merge=True)
+        messagebox.showinfo("Exportação Delta",
+                            f"Sequência {paths['seq']}: {paths['rows']} usuário(s) alterado(s)\n"
+                            f"CSV: {paths['csv']}\nJSON: {paths['json']}")
+
     def _undo_last(self):
         msg = self.history.undo_last()
         if msg is None:
@@ -379,6 +522,53 @@ class AppGUI(tk.Tk):
         self._refresh_user_table()
         messagebox.showinfo("Undo", msg)
 
+    def _award_medal_bulk(self):
+        from tkinter import simpledialog
+        medal = simpledialog.askstring("Medalha em lote", "Medalha:", parent=self)
+        role = simpledialog.askstring("Medalha em lote", "Tipo (ALUNO/PROFESSOR/VISITANTE):", parent=self)
+        if not medal or not role:
+            return
+        role = role.strip().upper()
+        alvo = [u for u in self.users.values() if u.role == role]
+        try:
+            with self.history.transaction(f"Medalha '{medal}' para {role}") as tx:
+                for u in alvo:
+                    self.history.push_and_exec(AwardMedalCommand(u, medal.strip(), self.points_engine))
+        except Exception as e:
+            messagebox.showerror("Medalha em lote", f"Lote desfeito: {e}")
+            return
+        self._refresh_user_table()
+        messagebox.showinfo("Medalha em lote", f"{len(tx)} usuário(s) premiado(s). 'Desfazer' reverte o lote inteiro.")
+
+    def _show_stats(self):
+        lines = [f"{r['role']}: {r['users']} usuário(s) | média {r['points_avg']} pts | p50 {r['points_p50']} | "
+                 f"p90 {r['points_p90']} | nível médio {r['level_avg']} | medalhas {r['medals']}"
+                 for r in self.reports.summary_rows(self.stats, "roles")]
+        messagebox.showinfo("Estatísticas", "\n".join(lines) or "Sem usuários.")
+
+    def _toggle_profiler(self):
+        if not self.profiler.running:
+            self.profiler.start(self.var_profiler_mode.get())
+            messagebox.showinfo("Profiler", f"Profiler ({self.profiler.mode}) iniciado.")
+            return
+        self.profiler.stop()
+        path = self.profiler.write_collapsed(self.profile_path)
+        self._show_text("Profiler", f"{self.profiler.report()}\n\nPilhas (flamegraph): {path}")
+
+    def _show_text(self, title, text):
+        # relatório tabular: janela com fonte monoespaçada em vez de messagebox
+        dlg = tk.Toplevel(self); dlg.title(title); dlg.geometry("760x420"); dlg.transient(self)
+        txt = tk.Text(dlg, font="TkFixedFont", wrap="none")
+        txt.insert("1.0", text); txt.config(state="disabled")
+        txt.pack(fill="both", expand=True, padx=8, pady=8)
+        ttk.Button(dlg, text="Fechar", command=dlg.destroy).pack(pady=(0, 8))
+
+    def _on_close(self):
+        # encerra as threads da federação antes de fechar a janela
+        if self._reports is not None:
+            self._reports.close()
+        self.destroy()
+
 
 def run():
     app = AppGUI()
@@ -1,6 +1,9 @@
 from __future__ import annotations
-import json, os
-from typing import Dict, Any
+import json, mmap, os, struct, sys, weakref
+from array import array
+from collections.abc import Mapping, MutableMapping
+from types import SimpleNamespace
+from typing import Dict, Any, Iterator, List, Optional, Set
 
 class JsonStore:
     def __init__(self, path: str):
@@ -13,6 +16,360 @@ class JsonStore:
         with open(self.path, 'r', encoding='utf-8') as f:
             return json.load(f)
 
-    def save(self, data: Dict[str, Any]) -> None:
+    def save(self, data: Dict[str, Any], compact: bool = False) -> None:
         with open(self.path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+            if compact:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            else:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+# ---------------- Snapshot binário ----------------
+# Layout (little-endian):
+#   header   magic, versão, nº de usuários, nº de strings e o offset de cada seção
+#   records  nº_usuários x (username_sid u32, role_sid u32, points i64, level u32, medal_start u32, medal_count u32)
+#   medals   u32 (ids de string das medalhas, referenciados por medal_start/medal_count)
+#   index    nº_usuários x u32: números de registro ordenados pelo username (busca binária)
+#   stroffs  (nº_strings + 1) x u64: offsets no blob
+#   strblob  strings UTF-8 (usernames, roles e medalhas, sem repetição)
+SNAPSHOT_MAGIC = b"GSNP"
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct("<4sHHIIQQQQQ")
+_RECORD = struct.Struct("<IIqIII")
+
+
+def write_snapshot(path: str, data: Dict[str, Any]) -> None:
+    """Grava o formato de data.json ({username: {role, points, level, medals}}) como snapshot binário."""
+    strings: Dict[str, int] = {}
+    blob: List[bytes] = []
+
+    def sid(text: str) -> int:
+        i = strings.get(text)
+        if i is None:
+            i = strings[text] = len(blob)
+            blob.append(text.encode("utf-8"))
+        return i
+
+    records = bytearray()
+    medal_ids: List[int] = []
+    names: List[bytes] = []
+    for username, info in data.items():
+        medals = info.get("medals", [])
+        records += _RECORD.pack(sid(username), sid(info.get("role", "ALUNO")), int(info.get("points", 0)),
+                                int(info.get("level", 1)), len(medal_ids), len(medals))
+        medal_ids.extend(sid(m) for m in medals)
+        names.append(blob[strings[username]])
+    order = sorted(range(len(names)), key=names.__getitem__)  # ordem de bytes UTF-8 == ordem de code points
+
+    offsets = [0]
+    for b in blob:
+        offsets.append(offsets[-1] + len(b))
+    records_off = _HEADER.size
+    medals_off = records_off + len(records)
+    index_off = medals_off + 4 * len(medal_ids)
+    stroffs_off = index_off + 4 * len(order)
+    strblob_off = stroffs_off + 8 * len(offsets)
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, len(names), len(blob),
+                          records_off, medals_off, index_off, stroffs_off, strblob_off)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(records)
+        for values, code in ((medal_ids, "I"), (order, "I"), (offsets, "Q")):
+            arr = array(code, values)
+            if sys.byteorder != "little":
+                arr.byteswap()
+            f.write(arr.tobytes())
+        for b in blob:
+            f.write(b)
+    os.replace(tmp, path)
+
+
+def _le_array(buf: memoryview, code: str):
+    """Vetor little-endian do arquivo: cast sem cópia no host little-endian, cópia com byteswap nos demais."""
+    if sys.byteorder == "little":
+        return buf.cast(code)
+    arr = array(code, bytes(buf))
+    arr.byteswap()
+    return arr
+
+
+class BinarySnapshot(Mapping):
+    """Snapshot aberto via mmap; cada usuário é decodificado apenas quando acessado.
+
+    Funciona como um Mapping {username: {role, points, level, medals}} (mesmo formato
+    de data.json), então `users_from_dict(snapshot)` continua válido; para carga
+    preguiçosa use `get_user(username)`.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        if self._mm is None or size < _HEADER.size:
+            raise ValueError(f"snapshot inválido: {path}")
+        (magic, version, _flags, self._count, self._nstrings, self._records_off, self._medals_off,
+         self._index_off, self._stroffs_off, self._strblob_off) = _HEADER.unpack_from(self._mm, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self._mm.close()
+            raise ValueError(f"snapshot inválido ou versão não suportada: {path}")
+        self._attach(self._mm)
+
+    def _attach(self, data) -> None:
+        self._data = data  # mmap do arquivo ou, após detach(), cópia em memória
+        buf = memoryview(data)
+        self._medals = _le_array(buf[self._medals_off:self._index_off], "I")
+        self._index = _le_array(buf[self._index_off:self._stroffs_off], "I")
+        self._stroffs = _le_array(buf[self._stroffs_off:self._stroffs_off + 8 * (self._nstrings + 1)], "Q")
+        self._buf = buf
+
+    def _release(self) -> None:
+        for view in (self._medals, self._index, self._stroffs, self._buf):
+            if isinstance(view, memoryview):
+                view.release()
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def detach(self) -> None:
+        """Copia o conteúdo para a memória e solta o mmap (o arquivo pode então ser substituído)."""
+        if self._mm is None:
+            return
+        data = bytes(self._mm)
+        self._release()
+        self._attach(data)
+
+    def close(self) -> None:
+        if self._data is None:
+            return
+        self._release()
+        self._data = None
+
+    def __enter__(self) -> "BinarySnapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---------------- Decodificação ----------------
+    def _raw(self, sid: int) -> bytes:
+        start = self._strblob_off + self._stroffs[sid]
+        return self._data[start:self._strblob_off + self._stroffs[sid + 1]]
+
+    def _str(self, sid: int) -> str:
+        return self._raw(sid).decode("utf-8")
+
+    def _record(self, rec: int):
+        return _RECORD.unpack_from(self._data, self._records_off + rec * _RECORD.size)
+
+    def _find(self, username: str) -> Optional[int]:
+        key = username.encode("utf-8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            rec = self._index[mid]
+            name = self._raw(self._record(rec)[0])
+            if name < key:
+                lo = mid + 1
+            elif name > key:
+                hi = mid
+            else:
+                return rec
+        return None
+
+    def record(self, rec: int) -> Dict[str, Any]:
+        """Decodifica o registro de número `rec` (ordem original de gravação)."""
+        name_sid, role_sid, points, level, m_start, m_count = self._record(rec)
+        return {"username": self._str(name_sid), "role": self._str(role_sid), "points": points, "level": level,
+                "medals": [self._str(self._medals[i]) for i in range(m_start, m_start + m_count)]}
+
+    def get_user(self, username: str):
+        """Constrói o User (via FACTORIES) de um único usuário, sem decodificar os demais."""
+        from app.core.users import FACTORIES
+        info = self.get(username)
+        if info is None:
+            return None
+        factory = FACTORIES.get(info["role"])
+        if factory is None:
+            return None
+        user = factory.create(username)
+        user.points, user.level, user.medals = info["points"], info["level"], info["medals"]
+        return user
+
+    # ---------------- Mapping ----------------
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, username: str) -> Dict[str, Any]:
+        rec = self._find(username)
+        if rec is None:
+            raise KeyError(username)
+        info = self.record(rec)
+        del info["username"]
+        return info
+
+    def __contains__(self, username: object) -> bool:
+        return isinstance(username, str) and self._find(username) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        # ordem original de gravação (a mesma do data.json convertido)
+        for rec in range(self._count):
+            yield self._str(self._record(rec)[0])
+
+    def items(self):
+        for rec in range(self._count):
+            info = self.record(rec)
+            yield info.pop("username"), info
+
+    def sorted_usernames(self, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        """Usernames em ordem alfabética (fatia do índice)."""
+        stop = self._count if stop is None else min(stop, self._count)
+        return [self._str(self._record(self._index[i])[0]) for i in range(start, stop)]
+
+
+class SnapshotStore:
+    """Mesma interface de JsonStore, porém no formato binário; `load()` devolve um BinarySnapshot.
+
+    Os snapshots entregues continuam válidos após `save()`: antes de substituir o arquivo,
+    os que ainda estão abertos são copiados para a memória (`detach`), liberando o mmap
+    (no Windows não é possível substituir um arquivo mapeado).
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._handed: List["weakref.ref[BinarySnapshot]"] = []
+        if not os.path.exists(path):
+            write_snapshot(path, {})
+
+    def load(self) -> BinarySnapshot:
+        snap = BinarySnapshot(self.path)
+        self._handed = [r for r in self._handed if r() is not None]
+        self._handed.append(weakref.ref(snap))
+        return snap
+
+    def save(self, data: Dict[str, Any], compact: bool = False) -> None:
+        for ref in self._handed:
+            snap = ref()
+            if snap is not None:
+                snap.detach()
+        self._handed = []
+        write_snapshot(self.path, data)
+
+
+class LazyUsers(MutableMapping):
+    """{username: User} sobre um BinarySnapshot: cada User é construído (`get_user`) só no primeiro acesso.
+
+    Usuários nunca acessados não são materializados; `users_to_dict` copia os registros deles
+    direto do snapshot. Iterar (`values()`, `items()`) materializa todos, como `users_from_dict`.
+    """
+    def __init__(self, snapshot: BinarySnapshot):
+        from app.core.users import FACTORIES
+        self.snapshot = snapshot
+        self._roles = FACTORIES  # registros de papel desconhecido são ignorados, como em users_from_dict
+        self._loaded: Dict[str, Any] = {}
+        self._added: Dict[str, None] = {}  # criados depois da carga (ordem de inserção)
+        self._deleted: Set[str] = set()
+
+    def __getitem__(self, username: str):
+        user = self._loaded.get(username)
+        if user is None:
+            if not isinstance(username, str) or username in self._deleted:
+                raise KeyError(username)
+            user = self.snapshot.get_user(username)
+            if user is None:
+                raise KeyError(username)
+            self._loaded[username] = user
+        return user
+
+    def __contains__(self, username: object) -> bool:
+        return self.get(username) is not None
+
+    def __setitem__(self, username: str, user) -> None:
+        if username not in self._loaded and username not in self.snapshot:
+            self._added[username] = None
+        self._loaded[username] = user
+        self._deleted.discard(username)
+
+    def __delitem__(self, username: str) -> None:
+        self[username]  # KeyError se não existir
+        del self._loaded[username]
+        self._added.pop(username, None)
+        self._deleted.add(username)
+
+    def _snapshot_rows(self) -> Iterator:
+        for username, info in self.snapshot.items():
+            if username not in self._deleted and info["role"] in self._roles:
+                yield username, info
+
+    def __iter__(self) -> Iterator[str]:
+        for username, _ in self._snapshot_rows():
+            yield username
+        yield from list(self._added)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._snapshot_rows()) + len(self._added)
+
+    @property
+    def loaded(self) -> int:
+        """Quantos usuários já foram materializados."""
+        return len(self._loaded)
+
+    def peek(self) -> Iterator[Any]:
+        """Estado atual (username, role, points, level, medals) de cada usuário sem materializar os não acessados."""
+        for username, info in self._snapshot_rows():
+            user = self._loaded.get(username)
+            yield user if user is not None else SimpleNamespace(username=username, **info)
+        for username in self._added:
+            yield self._loaded[username]
+
+
+def load_users(store) -> MutableMapping:
+    """Usuários de um JsonStore (dict de User) ou SnapshotStore (LazyUsers, carga preguiçosa)."""
+    raw = store.load()
+    return LazyUsers(raw) if isinstance(raw, BinarySnapshot) else users_from_dict(raw)
+
+
+def default_data_path(dirpath: str) -> str:
+    """data.snap se existir em `dirpath` (snapshot binário), senão data.json."""
+    snap = os.path.join(dirpath, "data.snap")
+    return snap if os.path.exists(snap) else os.path.join(dirpath, "data.json")
+
+
+def open_store(path: str):
+    """JsonStore ou SnapshotStore conforme a extensão (.snap => binário)."""
+    return SnapshotStore(path) if path.endswith(".snap") else JsonStore(path)
+
+
+def json_to_snapshot(json_path: str, snap_path: str) -> int:
+    data = JsonStore(json_path).load()
+    write_snapshot(snap_path, data)
+    return len(data)
+
+
+def snapshot_to_json(snap_path: str, json_path: str) -> int:
+    with BinarySnapshot(snap_path) as snap:
+        data = dict(snap.items())
+    JsonStore(json_path).save(data)
+    return len(data)
+
+
+def users_to_dict(users: Dict[str, Any]) -> Dict[str, Any]:
+    """Converte {username: User} no formato gravado em data.json."""
+    if isinstance(users, LazyUsers):
+        return {u.username: {"role": u.role, "points": u.points, "level": u.level, "medals": u.medals}
+                for u in users.peek()}
+    return {u: {"role": obj.role, "points": obj.points, "level": obj.level, "medals": obj.medals}
+            for u, obj in users.items()}
+
+
+def users_from_dict(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Reconstrói {username: User} (via FACTORIES) a partir do formato de data.json."""
+    from app.core.users import FACTORIES
+    users = {}
+    for u, info in raw.items():
+        factory = FACTORIES.get(info.get("role", "ALUNO"))
+        if factory:
+            users[u] = factory.create(u)
+            users[u].points = info.get("points", 0)
+            users[u].level = info.get("level", 1)
+            users[u].medals = info.get("medals", [])
+    return users
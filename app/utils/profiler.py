@@ -0,0 +1,201 @@
+from __future__ import annotations
+import os, sys, threading, time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# Frame key: (module, function, first line). Only frames from the "app" package are kept.
+FrameKey = Tuple[str, str, int]
+
+
+def _frame_key(frame) -> Optional[FrameKey]:
+    module = frame.f_globals.get("__name__", "")
+    if module != "app" and not module.startswith("app."):
+        return None
+    return (module, frame.f_code.co_name, frame.f_code.co_firstlineno)
+
+
+def _label(key: FrameKey) -> str:
+    return f"{key[0]}:{key[1]}:{key[2]}"
+
+
+class Profiler:
+    """Profiler ligável/desligável em tempo de execução.
+
+    mode="sampling": uma thread amostra as pilhas de todas as threads a cada `interval` segundos.
+    mode="deterministic": usa sys.setprofile e mede cada chamada (mais preciso, mais caro).
+    Em ambos os modos, apenas funções dos módulos `app.*` são agregadas.
+    """
+    MODES = ("sampling", "deterministic")
+
+    def __init__(self, mode: str = "sampling", interval: float = 0.005):
+        if mode not in self.MODES:
+            raise ValueError(f"modo inválido: {mode}")
+        self.mode = mode
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._running = False
+        self._sampler: Optional[threading.Thread] = None
+        self._started_at = 0.0
+        self.elapsed = 0.0
+        self._reset()
+
+    def _reset(self) -> None:
+        self.self_time: Dict[FrameKey, float] = defaultdict(float)
+        self.cum_time: Dict[FrameKey, float] = defaultdict(float)
+        self.calls: Dict[FrameKey, int] = defaultdict(int)
+        self.stacks: Dict[Tuple[FrameKey, ...], float] = defaultdict(float)
+        self._tls = threading.local()
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    # ---------------- Controle ----------------
+    def start(self, mode: Optional[str] = None) -> None:
+        """Inicia a coleta; `mode` troca o modo (só entre execuções)."""
+        if self._running:
+            return
+        if mode is not None:
+            if mode not in self.MODES:
+                raise ValueError(f"modo inválido: {mode}")
+            self.mode = mode
+        self._reset()
+        self._running = True
+        self._started_at = time.perf_counter()
+        if self.mode == "sampling":
+            self._sampler = threading.Thread(target=self._sample_loop, name="app-profiler", daemon=True)
+            self._sampler.start()
+        else:
+            threading.setprofile(self._profile_hook)
+            sys.setprofile(self._profile_hook)
+
+    def stop(self) -> None:
+        if not self._running:
+            return
+        self._running = False
+        if self.mode == "sampling":
+            if self._sampler is not None:
+                self._sampler.join()
+                self._sampler = None
+        else:
+            sys.setprofile(None)
+            threading.setprofile(None)
+        self.elapsed = time.perf_counter() - self._started_at
+
+    def toggle(self) -> bool:
+        """Liga/desliga; retorna True se o profiler ficou ativo."""
+        if self._running:
+            self.stop()
+        else:
+            self.start()
+        return self._running
+
+    # ---------------- Amostragem ----------------
+    def _sample_loop(self) -> None:
+        me = threading.get_ident()
+        last = time.perf_counter()
+        while self._running:
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            dt, last = now - last, now
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                stack: List[FrameKey] = []
+                while frame is not None:
+                    key = _frame_key(frame)
+                    if key is not None:
+                        stack.append(key)
+                    frame = frame.f_back
+                if not stack:
+                    continue
+                stack.reverse()
+                with self._lock:
+                    self.stacks[tuple(stack)] += dt
+                    self.self_time[stack[-1]] += dt
+                    for key in set(stack):
+                        self.cum_time[key] += dt
+                        self.calls[key] += 1  # no modo amostral: número de amostras
+
+    # ---------------- Determinístico ----------------
+    def _profile_hook(self, frame, event, arg) -> None:
+        if event not in ("call", "return"):
+            return
+        key = _frame_key(frame)
+        if key is None:
+            return
+        tls = self._tls
+        stack = getattr(tls, "stack", None)
+        if stack is None:
+            stack = tls.stack = []  # itens: [key, inicio, tempo_filhos]
+        now = time.perf_counter()
+        if event == "call":
+            stack.append([key, now, 0.0])
+            return
+        if not stack or stack[-1][0] != key:
+            return  # chamada iniciada antes do start()
+        path = tuple(item[0] for item in stack)
+        _, begin, children = stack.pop()
+        total = now - begin
+        own = total - children
+        with self._lock:
+            self.calls[key] += 1
+            self.self_time[key] += own
+            if key not in path[:-1]:  # evita contar duas vezes em recursão
+                self.cum_time[key] += total
+            self.stacks[path] += own
+        if stack:
+            stack[-1][2] += total
+
+    # ---------------- Saída ----------------
+    def stats(self, limit: int = 20) -> List[Dict[str, object]]:
+        """Funções ordenadas por tempo próprio (self) decrescente."""
+        with self._lock:
+            keys = sorted(self.self_time, key=lambda k: self.self_time[k], reverse=True)[:limit]
+            return [{
+                "function": _label(k),
+                "calls": self.calls[k],
+                "self_sec": round(self.self_time[k], 6),
+                "cum_sec": round(self.cum_time[k], 6),
+            } for k in keys]
+
+    def write_collapsed(self, path: str) -> str:
+        """Grava pilhas no formato 'collapsed' (flamegraph.pl / speedscope), valores em microssegundos."""
+        with self._lock:
+            items = list(self.stacks.items())
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, secs in items:
+                us = int(secs * 1_000_000)
+                if us > 0:
+                    f.write(";".join(_label(k) for k in stack) + f" {us}\n")
+        return os.path.abspath(path)
+
+    def report(self, limit: int = 20) -> str:
+        lines = [f"Profiler ({self.mode}) - {self.elapsed:.3f}s",
+                 f"{'self(s)':>10} {'cum(s)':>10} {'calls':>8}  função"]
+        for row in self.stats(limit):
+            lines.append(f"{row['self_sec']:>10.4f} {row['cum_sec']:>10.4f} {row['calls']:>8}  {row['function']}")
+        return "\n".join(lines)
+
+
+def install_signal_toggle(profiler: Profiler, output_path: str, signum: Optional[int] = None) -> bool:
+    """Alterna o profiler ao receber um sinal (SIGUSR1 por padrão); ao parar, grava as pilhas.
+
+    Retorna False em plataformas sem o sinal (ex.: Windows) ou fora da thread principal
+    (ex.: app embutida ou criada pela thread de um test runner)."""
+    import signal
+    if signum is None:
+        signum = getattr(signal, "SIGUSR1", None)
+    if signum is None:
+        return False
+
+    def _handler(_signum, _frame):
+        if not profiler.toggle():
+            profiler.write_collapsed(output_path)
+            print(profiler.report())
+
+    try:
+        signal.signal(signum, _handler)
+    except ValueError:  # signal.signal só é permitido na thread principal
+        return False
+    return True
@@ -0,0 +1,243 @@
+from __future__ import annotations
+import json, os, random, time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from itertools import accumulate
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.users import FACTORIES, User
+
+DAY = 86400
+
+
+@dataclass
+class WorkloadConfig:
+    """Parâmetros da carga sintética (mesma semente => mesma carga)."""
+    users: int = 1000
+    challenges: int = 20
+    questions: Tuple[int, int] = (5, 30)      # faixa de questões por desafio
+    weighted: float = 0.5                     # fração de desafios com pesos por questão
+    attempts: int = 10000
+    days: int = 14
+    start_ts: Optional[float] = None          # início do período (padrão: `days` dias atrás, à meia-noite)
+    zipf_s: float = 1.1                       # expoente da atividade por usuário (Zipf)
+    role_mix: Dict[str, float] = field(default_factory=lambda: {"ALUNO": 0.85, "PROFESSOR": 0.05, "VISITANTE": 0.10})
+    weekend_burst: float = 2.5                # multiplicador de tentativas no fim de semana (evento)
+    weekend_double_xp: float = 0.8            # probabilidade de Double XP no fim de semana
+    seed: int = 42
+
+
+class WorkloadGenerator:
+    """Gera usuários, desafios e um fluxo de tentativas com distribuição realista.
+
+    - usuários distribuídos entre os papéis de `FACTORIES` conforme `role_mix`
+    - atividade por usuário segue Zipf (poucos usuários fazem a maioria das tentativas)
+    - fins de semana concentram mais tentativas e Double XP (evento)
+    - acerto e tempo de resposta dependem da habilidade sorteada de cada usuário
+    """
+    def __init__(self, config: Optional[WorkloadConfig] = None):
+        self.config = config or WorkloadConfig()
+        cfg = self.config
+        if cfg.days < 1 or cfg.users < 1 or cfg.challenges < 1:
+            raise ValueError("days, users e challenges devem ser >= 1")
+        if cfg.attempts < 0:
+            raise ValueError("attempts deve ser >= 0")
+        if not 0 <= cfg.questions[0] <= cfg.questions[1]:
+            raise ValueError("faixa de questões inválida (0 <= mín <= máx)")
+        if cfg.start_ts is None:
+            lt = time.localtime(time.time() - cfg.days * DAY)
+            cfg.start_ts = time.mktime((lt.tm_year, lt.tm_mon, lt.tm_mday, 0, 0, 0, 0, 0, -1))
+        rnd = random.Random(cfg.seed)
+        roles, weights = zip(*cfg.role_mix.items())
+        self._names = [f"user{i:07d}" for i in range(cfg.users)]
+        self._roles = rnd.choices(roles, weights, k=cfg.users)
+        self._skill = [rnd.betavariate(2.5, 2.0) for _ in range(cfg.users)]
+        # posição no ranking de atividade embaralhada para não favorecer os primeiros usernames
+        ranks = list(range(1, cfg.users + 1))
+        rnd.shuffle(ranks)
+        self._activity = list(accumulate(1.0 / r ** cfg.zipf_s for r in ranks))
+        self._challenges = self._build_challenges(rnd)
+
+    # ---------------- Dados base ----------------
+    def users(self) -> Dict[str, User]:
+        return {name: FACTORIES[role].create(name) for name, role in zip(self._names, self._roles)}
+
+    def challenges(self) -> List[Dict[str, Any]]:
+        """Desafios no formato lido por `load_challenges` (CLI)."""
+        return self._challenges
+
+    def _build_challenges(self, rnd: random.Random) -> List[Dict[str, Any]]:
+        cfg = self.config
+        lo, hi = cfg.questions
+        out = []
+        for i in range(cfg.challenges):
+            weighted = rnd.random() < cfg.weighted
+            questions = []
+            for j in range(rnd.randint(lo, hi)):
+                q: Dict[str, Any] = {"q": f"Questão {j + 1}", "options": ["A", "B", "C", "D"],
+                                     "correct_index": rnd.randrange(4)}
+                if weighted:
+                    q["weight"] = rnd.choice((0.5, 1.0, 1.0, 1.5, 2.0))
+                questions.append(q)
+            out.append({"id": f"ch{i:04d}", "title": f"Desafio {i + 1}", "difficulty": rnd.randint(1, 5),
+                        "questions": questions})
+        return out
+
+    # ---------------- Tentativas ----------------
+    def _day_counts(self) -> List[int]:
+        """Distribui as tentativas pelos dias, com peso maior nos fins de semana."""
+        cfg = self.config
+        weights = [cfg.weekend_burst if self._is_weekend(cfg.start_ts + d * DAY) else 1.0 for d in range(cfg.days)]
+        total_w = sum(weights)
+        counts = [int(cfg.attempts * w / total_w) for w in weights]
+        for d in range(cfg.attempts - sum(counts)):
+            counts[d % cfg.days] += 1
+        return counts
+
+    @staticmethod
+    def _is_weekend(ts: float) -> bool:
+        return time.localtime(ts).tm_wday >= 5
+
+    def attempts(self) -> Iterator[Dict[str, Any]]:
+        """Fluxo de tentativas em ordem de tempo; `t` é o deslocamento em segundos desde o início.
+
+        Cada registro tem o formato de entrada de `python -m app grade`/`replay`.
+        """
+        cfg = self.config
+        rnd = random.Random(cfg.seed + 1)
+        total_activity = self._activity[-1]
+        last_day: Dict[int, int] = {}
+        streak: Dict[int, int] = {}
+        for day, count in enumerate(self._day_counts()):
+            weekend = self._is_weekend(cfg.start_ts + day * DAY)
+            # horários do dia concentrados entre 8h e 23h
+            offsets = sorted(rnd.uniform(8 * 3600, 23 * 3600) for _ in range(count))
+            for off in offsets:
+                u = bisect_left(self._activity, rnd.random() * total_activity)
+                if last_day.get(u) != day:
+                    streak[u] = streak.get(u, 0) + 1 if last_day.get(u) == day - 1 else 0
+                    last_day[u] = day
+                ch = self._challenges[rnd.randrange(len(self._challenges))]
+                skill = self._skill[u]
+                answers = [q["correct_index"] if rnd.random() < skill else rnd.randrange(4) for q in ch["questions"]]
+                per_q = rnd.lognormvariate(2.6, 0.4) * (1.4 - skill)
+                yield {
+                    "t": round(day * DAY + off, 3),
+                    "username": self._names[u],
+                    "challenge_id": ch["id"],
+                    "answers": answers,
+                    "time_sec": round(per_q * len(answers), 1),
+                    "double_xp": weekend and rnd.random() < cfg.weekend_double_xp,
+                    "streak_days": streak[u],
+                }
+
+    def write(self, outdir: str) -> Dict[str, str]:
+        """Grava data.json, challenges.json e attempts.jsonl (o trace) em `outdir`."""
+        from app.utils.persistence import JsonStore, users_to_dict
+        os.makedirs(outdir, exist_ok=True)
+        paths = {k: os.path.join(outdir, f) for k, f in
+                 (("data", "data.json"), ("challenges", "challenges.json"), ("trace", "attempts.jsonl"))}
+        JsonStore(paths["data"]).save(users_to_dict(self.users()), compact=True)
+        with open(paths["challenges"], "w", encoding="utf-8") as f:
+            json.dump(self.challenges(), f, ensure_ascii=False)
+        with open(paths["trace"], "w", encoding="utf-8") as f:
+            for rec in self.attempts():
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        return paths
+
+
+# ---------------- Gravação / reprodução de traces ----------------
+class TraceRecorder:
+    """Grava tentativas (JSON Lines) com `t` relativo ao início da gravação.
+
+    Use `tap(records)` na leitura da entrada: `t` marca a chegada da submissão, não o
+    momento em que o lote dela foi corrigido/aplicado.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "w", encoding="utf-8")
+        self._start = time.perf_counter()
+
+    def record(self, sub: Dict[str, Any]) -> None:
+        rec = {k: v for k, v in sub.items() if k != "t"}
+        rec["t"] = round(time.perf_counter() - self._start, 6)
+        self._f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    def tap(self, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Repassa `records` gravando cada um no instante em que é lido."""
+        for rec in records:
+            self.record(rec)
+            yield rec
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self) -> "TraceRecorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[i]
+
+
+def replay(records: Iterable[Dict[str, Any]], handler: Callable[[Dict[str, Any]], Dict[str, Any]],
+           rate: Optional[float] = None, speed: float = 1.0, limit: Optional[int] = None,
+           on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Reproduz um trace chamando `handler` para cada tentativa no ritmo alvo.
+
+    - `rate`: tentativas por segundo constantes (ignora os tempos do trace)
+    - sem `rate`: respeita o campo `t` do trace acelerado por `speed` (0 = sem espera)
+
+    O agendamento é absoluto: se o handler atrasar, as próximas saem sem espera
+    até recuperar o cronograma, e o atraso máximo é reportado em `max_lag_ms`.
+    """
+    latencies: List[float] = []
+    errors = 0
+    max_lag = 0.0
+    first_t: Optional[float] = None
+    start = time.perf_counter()
+    for n, rec in enumerate(records):
+        if limit is not None and n >= limit:
+            break
+        if rate:
+            due = n / rate
+        elif speed > 0:
+            t = float(rec.get("t") or 0.0)
+            first_t = t if first_t is None else first_t
+            due = (t - first_t) / speed
+        else:
+            due = None
+        if due is not None:
+            now = time.perf_counter() - start
+            if due > now:
+                time.sleep(due - now)
+            else:
+                max_lag = max(max_lag, now - due)
+        t0 = time.perf_counter()
+        res = handler(rec)
+        latencies.append(time.perf_counter() - t0)
+        if "error" in res:
+            errors += 1
+        if on_result is not None:
+            on_result(res)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    sent = len(latencies)
+    return {
+        "sent": sent,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rate": round(sent / elapsed, 1) if elapsed > 0 else 0.0,
+        "target_rate": rate,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        "max_lag_ms": round(max_lag * 1000, 3),
+    }
@@ -0,0 +1,50 @@
+"""Escalabilidade da análise do audit log: gera um log sintético e mede 1..N processos.
+
+Uso:
+    python benchmarks/audit_analytics.py [--lines 2000000] [--max-workers N] [--path /tmp/audit_bench.log]
+"""
+from __future__ import annotations
+import argparse, json, os, random, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.reports.analytics import AuditAnalytics
+
+
+def generate(path: str, lines: int, seed: int = 3) -> None:
+    rnd = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(lines):
+            user = f"u{int(rnd.paretovariate(1.2)) % 5000}"
+            day = 1 + (i * 28) // lines
+            if rnd.random() < 0.9:
+                rec = {"ts": f"2026-02-{day:02d}T10:00:00", "event": "POINTS_GAINED", "username": user,
+                       "meta": {"points": rnd.randint(50, 500), "total": 0}}
+            else:
+                rec = {"ts": f"2026-02-{day:02d}T10:00:00", "event": "MEDAL_UNLOCKED", "username": user,
+                       "meta": {"medal": rnd.choice(["Iniciante 100+", "Intermediário 500+"])}}
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--lines", type=int, default=2_000_000)
+    ap.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--path", default="/tmp/audit_bench.log")
+    args = ap.parse_args()
+
+    if not os.path.exists(args.path):
+        generate(args.path, args.lines)
+    size_mb = os.path.getsize(args.path) / 1e6
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        t0 = time.perf_counter()
+        res = AuditAnalytics(args.path, workers).run()
+        dt = time.perf_counter() - t0
+        baseline = baseline or dt
+        print(f"{workers:>3} wk: {dt:7.2f}s  {size_mb / dt:8.1f} MB/s  speedup={baseline / dt:5.2f}x  linhas={res['lines']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""Escalabilidade da correção em lote: serial vs GradingPool com 1..N processos.
+
+Uso:
+    python benchmarks/grading_scaling.py [--subs 200000] [--questions 40] [--max-workers N]
+"""
+from __future__ import annotations
+import argparse, os, random, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.challenges.challenge import QuizChallenge
+from app.challenges.grading_pool import GradingPool
+from app.challenges.scoring import CompositeStrategy, DifficultyStrategy, AccuracyStrategy, TimeStrategy
+
+
+def build(n: int, q: int, seed: int = 7):
+    rnd = random.Random(seed)
+    questions = [{"q": f"Q{i}", "options": ["a", "b", "c", "d"], "correct_index": rnd.randrange(4),
+                  "weight": round(rnd.uniform(0.5, 1.5), 2)} for i in range(q)]
+    ch = QuizChallenge(id="bench", title="Bench", difficulty=3, questions=questions)
+    answers = [[rnd.randrange(4) for _ in range(q)] for _ in range(n)]
+    times = [rnd.uniform(5, 180) for _ in range(n)]
+    return ch, answers, times
+
+
+def serial(ch, answers, times):
+    strat = CompositeStrategy(DifficultyStrategy(), AccuracyStrategy(), TimeStrategy())
+    out = []
+    for a, t in zip(answers, times):
+        res = ch.evaluate(a)
+        out.append(strat.score({"difficulty": ch.difficulty, "accuracy": res["accuracy"], "time_sec": t}))
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--subs", type=int, default=200_000)
+    ap.add_argument("--questions", type=int, default=40)
+    ap.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    ch, answers, times = build(args.subs, args.questions)
+    t0 = time.perf_counter()
+    expected = serial(ch, answers, times)
+    base = time.perf_counter() - t0
+    print(f"{'serial':>10}: {base:7.3f}s  {args.subs / base:10.0f} subs/s")
+
+    workers = 1
+    while workers <= args.max_workers:
+        with GradingPool(workers) as pool:
+            pool.grade(ch, answers[:workers], times[:workers])  # aquece os processos
+            t0 = time.perf_counter()
+            got = pool.grade(ch, answers, times)
+            dt = time.perf_counter() - t0
+        assert [r["raw_points"] for r in got] == expected, "resultado diverge do serial"
+        print(f"{workers:>7} wk: {dt:7.3f}s  {args.subs / dt:10.0f} subs/s  speedup={base / dt:5.2f}x")
+        workers = workers * 2 if workers * 2 <= args.max_workers or workers == args.max_workers else args.max_workers
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""Páginas por segundo: gerador PDF embutido vs reportlab (quando instalado).
+
+Uso:
+    python benchmarks/pdf_export.py [--rows 100000]
+"""
+from __future__ import annotations
+import argparse, os, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.reports.exporters import PDFExporter, reportlab_available
+from app.reports.pdfwriter import write_table_pdf
+
+
+def rows(n: int):
+    for i in range(n):
+        yield {"username": f"usuario{i:06d}", "role": ("ALUNO", "PROFESSOR", "VISITANTE")[i % 3],
+               "points": i * 7 % 5000, "level": 1 + (i * 7 % 5000) // 100, "medals": "Iniciante 100+"}
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100_000)
+    args = ap.parse_args()
+    out = os.path.join(tempfile.gettempdir(), "bench_report.pdf")
+
+    t0 = time.perf_counter()
+    pages = write_table_pdf(out, rows(args.rows))
+    dt = time.perf_counter() - t0
+    print(f"embutido : {pages} páginas em {dt:6.2f}s  -> {pages / dt:8.1f} páginas/s  ({os.path.getsize(out) / 1e6:.1f} MB)")
+
+    if not reportlab_available():
+        print("reportlab: não instalado (pip install reportlab para comparar)")
+        return 0
+    data = list(rows(args.rows))
+    t0 = time.perf_counter()
+    PDFExporter(engine="reportlab").export(out, data)
+    dt_rl = time.perf_counter() - t0
+    rl_pages = -(-args.rows // 40)  # o layout do reportlab cabe ~40 linhas por página A4
+    print(f"reportlab: ~{rl_pages} páginas em {dt_rl:6.2f}s  -> {rl_pages / dt_rl:8.1f} páginas/s  "
+          f"| linhas/s: embutido {args.rows / dt:,.0f} x reportlab {args.rows / dt_rl:,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Mede o tempo de import (python -X importtime) de cada ponto de entrada.
+
+Uso:
+    python benchmarks/startup_importtime.py [--runs 5] [--history benchmarks/importtime_history.jsonl]
+
+Cada execução grava uma linha no histórico (JSON lines) e mostra a variação
+em relação à execução anterior, para acompanhar regressões de startup.
+"""
+from __future__ import annotations
+import argparse, json, os, statistics, subprocess, sys, time
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ponto de entrada -> módulo que ele efetivamente carrega
+ENTRY_POINTS: Dict[str, str] = {
+    "main.py": "app.ui.console",
+    "main_gui.py": "app.ui.gui",
+    "python -m app": "app.cli",
+}
+
+
+def importtime(module: str) -> Tuple[int, Dict[str, int]]:
+    """Executa um interpretador novo e retorna (total_us, {modulo: cumulativo_us})."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    total = 0
+    per_module: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _self_us, cum_us, name = line[len("import time:"):].split("|")
+        per_module[name.strip()] = int(cum_us)
+        if not name[1:].startswith(" "):  # módulo de nível superior (sem indentação)
+            total += int(cum_us)
+    return total, per_module
+
+
+def measure(module: str, runs: int) -> Dict[str, object]:
+    totals: List[int] = []
+    app_modules: Dict[str, List[int]] = {}
+    for _ in range(runs):
+        total, per_module = importtime(module)
+        totals.append(total)
+        for name, us in per_module.items():
+            if name == "app" or name.startswith("app."):
+                app_modules.setdefault(name, []).append(us)
+    top = sorted(((n, int(statistics.median(v))) for n, v in app_modules.items()), key=lambda x: x[1], reverse=True)
+    return {"median_us": int(statistics.median(totals)), "min_us": min(totals), "top_app_modules": top[:8]}
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--history", default=os.path.join(ROOT, "benchmarks", "importtime_history.jsonl"))
+    args = ap.parse_args(argv)
+
+    previous: Dict[str, int] = {}
+    if os.path.exists(args.history):
+        with open(args.history, encoding="utf-8") as f:
+            lines = [ln for ln in f if ln.strip()]
+        if lines:
+            previous = json.loads(lines[-1]).get("entries", {})
+
+    entries: Dict[str, int] = {}
+    for entry, module in ENTRY_POINTS.items():
+        try:
+            res = measure(module, args.runs)
+        except RuntimeError as e:
+            print(f"{entry:<14} indisponível ({e})")
+            continue
+        entries[entry] = res["median_us"]
+        delta = ""
+        if entry in previous:
+            delta = f" ({res['median_us'] - previous[entry]:+d} us vs anterior)"
+        print(f"{entry:<14} mediana={res['median_us'] / 1000:.1f} ms  min={res['min_us'] / 1000:.1f} ms{delta}")
+        for name, us in res["top_app_modules"]:
+            print(f"    {us / 1000:7.2f} ms  {name}")
+
+    with open(args.history, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+                            "runs": args.runs, "entries": entries}) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())